@@ -0,0 +1,339 @@
+"""
+On-disk face gallery format.
+
+A gallery is a directory holding:
+
+    header.json      format version, embedding dtype and dimension, entry count
+    embeddings.npy   (count, dim) float32 or float16 embedding matrix
+    ids.npy          (count,) int64 employee ids, row-aligned with embeddings
+    hashes.npy       (count,) hex SHA-1 digests of the source images
+    sources.npy      (count,) paths of the source images
+    stats.npy        (count, 2) int64 modification time (ns) and size of each
+                     source image when it was hashed, so an unchanged photo is
+                     recognised without reading it again
+
+Every array is a plain .npy file, so it can be opened with
+np.load(mmap_mode='r') and shared page-cached between worker processes
+instead of each process holding its own Python lists of arrays.
+
+The gallery path itself is a stable directory of versions: each save
+writes a new `v-*` directory and then atomically replaces the CURRENT
+pointer file naming it, so readers always open a complete version and
+concurrent writers never share a working directory. Galleries written
+before versioning (the files directly in the path) are still readable.
+
+Writers that load a gallery, change it and save it back hold gallery_lock()
+for the whole read-modify-write, so concurrent enrollments cannot drop each
+other's entries.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Bump when the layout changes and register a step in GALLERY_MIGRATIONS
+GALLERY_FORMAT_VERSION = 2
+
+HEADER_FILE = 'header.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+IDS_FILE = 'ids.npy'
+HASHES_FILE = 'hashes.npy'
+SOURCES_FILE = 'sources.npy'
+STATS_FILE = 'stats.npy'
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'LOCK'
+
+VERSION_PREFIX = 'v-'
+# Versions that are no longer current are removed once they are this old, in
+# case a save could not delete its predecessor (still open elsewhere, or
+# replaced by a concurrent save first)
+STALE_VERSION_AGE = 60 * 60
+
+# Times load_gallery() follows CURRENT to a newer version when the one it
+# resolved is removed by a concurrent save before it is opened
+LOAD_ATTEMPTS = 5
+
+SUPPORTED_DTYPES = ('float32', 'float16')
+HASH_DTYPE = 'S40'
+
+# Stats recorded for rows whose source image was never stat'ed; they match no file
+UNKNOWN_STAT = (-1, -1)
+
+
+class GalleryFormatError(Exception):
+    """Raised when a gallery directory is missing, corrupt or cannot be migrated."""
+
+
+class FaceGallery:
+    """Read-only view over a loaded gallery."""
+
+    def __init__(self, header, embeddings, ids, hashes, sources, stats):
+        self.header = header
+        self.embeddings = embeddings
+        self.ids = ids
+        self.hashes = hashes
+        self.sources = sources
+        self.stats = stats
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fingerprint(self):
+        """Return {employee_id: image_hash} for staleness checks."""
+        return {int(employee_id): image_hash.decode() for employee_id, image_hash in zip(self.ids, self.hashes)}
+
+    def is_unchanged(self, row, source, stat):
+        """Whether row `row` was hashed from the file at `source` while it had this image_stat()."""
+        return str(self.sources[row]) == source and tuple(int(value) for value in self.stats[row]) == tuple(stat)
+
+
+def hash_image_file(path):
+    """Hex SHA-1 digest of an image file, used to detect re-uploaded photos."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as image_file:
+        for chunk in iter(lambda: image_file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_stat(path):
+    """(modification time in ns, size) of an image file; take it before hashing the file."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def gallery_lock(path):
+    """
+    Hold an exclusive lock on the gallery at `path`, across processes, for a
+    load-change-save sequence. save_gallery() does not take it itself, so the
+    lock can span the load the save is based on.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after about 10 seconds; keep waiting
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def save_gallery(path, ids, embeddings, hashes, dtype='float32', sources=None, stats=None):
+    """
+    Write a gallery to `path`, replacing any existing one. `sources` and
+    `stats` are the image path and image_stat() each hash was taken from;
+    rows without them are hashed again on the next reuse check.
+
+    The new version is written to its own temporary directory under `path`
+    and published by atomically replacing the CURRENT pointer, so readers
+    never see a half-written gallery. Callers that base the save on a loaded
+    gallery must hold gallery_lock() from the load to the save.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise GalleryFormatError(f"Unsupported embedding dtype: {dtype}")
+
+    ids = np.asarray(ids, dtype=np.int64)
+    hashes = np.asarray(hashes, dtype=HASH_DTYPE)
+    if len(ids):
+        embeddings = np.asarray(embeddings, dtype=dtype)
+    else:
+        embeddings = np.zeros((0, 0), dtype=dtype)
+    sources = np.asarray(sources if sources is not None else [''] * len(ids), dtype=str)
+    stats = np.asarray(stats if stats is not None else [UNKNOWN_STAT] * len(ids), dtype=np.int64).reshape(-1, 2)
+
+    if embeddings.ndim != 2 or not (len(ids) == len(hashes) == len(sources) == len(stats) == embeddings.shape[0]):
+        raise GalleryFormatError("ids, hashes, sources, stats and embeddings must have the same number of rows")
+
+    header = {
+        'version': GALLERY_FORMAT_VERSION,
+        'dtype': dtype,
+        'dim': int(embeddings.shape[1]),
+        'count': int(len(ids)),
+    }
+
+    os.makedirs(path, exist_ok=True)
+    version_path = tempfile.mkdtemp(prefix=VERSION_PREFIX, dir=path)
+    try:
+        np.save(os.path.join(version_path, EMBEDDINGS_FILE), embeddings)
+        np.save(os.path.join(version_path, IDS_FILE), ids)
+        np.save(os.path.join(version_path, HASHES_FILE), hashes)
+        np.save(os.path.join(version_path, SOURCES_FILE), sources)
+        np.save(os.path.join(version_path, STATS_FILE), stats)
+        with open(os.path.join(version_path, HEADER_FILE), 'w') as header_file:
+            json.dump(header, header_file)
+
+        previous = _current_version(path)
+
+        # os.replace() is atomic, so CURRENT always names a complete version
+        fd, pointer_path = tempfile.mkstemp(prefix=f"{CURRENT_FILE}.", dir=path)
+        with os.fdopen(fd, 'w') as pointer_file:
+            pointer_file.write(os.path.basename(version_path))
+        os.replace(pointer_path, os.path.join(path, CURRENT_FILE))
+    except BaseException:
+        shutil.rmtree(version_path, ignore_errors=True)
+        raise
+
+    if previous is not None:
+        shutil.rmtree(os.path.join(path, previous), ignore_errors=True)
+    _remove_stale_versions(path)
+
+
+def _current_version(path):
+    """Name of the version directory CURRENT points to, or None."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as pointer_file:
+            return pointer_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _remove_stale_versions(path):
+    current = _current_version(path)
+    cutoff = time.time() - STALE_VERSION_AGE
+    for name in os.listdir(path):
+        version_path = os.path.join(path, name)
+        if name.startswith(VERSION_PREFIX) and name != current:
+            try:
+                if os.path.getmtime(version_path) < cutoff:
+                    shutil.rmtree(version_path, ignore_errors=True)
+            except OSError:
+                pass
+
+    # Files from the pre-versioning layout are superseded by the first versioned save
+    for name in (HEADER_FILE, EMBEDDINGS_FILE, IDS_FILE, HASHES_FILE, SOURCES_FILE, STATS_FILE):
+        try:
+            os.remove(os.path.join(path, name))
+        except OSError:
+            pass
+
+
+def resolve_gallery(path):
+    """The directory holding the current version's files."""
+    current = _current_version(path)
+    if current is None:
+        # Unversioned gallery written before CURRENT existed
+        return path
+    return os.path.join(path, current)
+
+
+def read_header(path):
+    header_path = os.path.join(path, HEADER_FILE)
+    if not os.path.exists(header_path):
+        raise GalleryFormatError(f"No gallery found at {path}")
+
+    try:
+        with open(header_path) as header_file:
+            header = json.load(header_file)
+    except FileNotFoundError:
+        raise GalleryFormatError(f"No gallery found at {path}")
+    except ValueError as e:
+        raise GalleryFormatError(f"Corrupt gallery header at {path}: {e}")
+
+    if 'version' not in header:
+        raise GalleryFormatError(f"Gallery header at {path} has no version")
+    return header
+
+
+def load_gallery(path, mmap=True):
+    """
+    Load a gallery, migrating it to the current format version if needed.
+
+    With mmap=True the arrays are memory-mapped read-only, so processes
+    loading the same gallery share one page-cached copy.
+    """
+    version_path = resolve_gallery(path)
+    for attempt in range(LOAD_ATTEMPTS):
+        try:
+            return _load_version(version_path, mmap)
+        except GalleryFormatError:
+            # A concurrent save may have replaced and removed this version between
+            # resolving and opening it; retry with the version CURRENT names now
+            latest = resolve_gallery(path)
+            if latest == version_path or attempt == LOAD_ATTEMPTS - 1:
+                raise
+            version_path = latest
+
+
+def _load_version(path, mmap):
+    header = read_header(path)
+
+    if header['version'] != GALLERY_FORMAT_VERSION:
+        migrate_gallery(path)
+        header = read_header(path)
+
+    mmap_mode = 'r' if mmap else None
+    try:
+        embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode=mmap_mode)
+        ids = np.load(os.path.join(path, IDS_FILE), mmap_mode=mmap_mode)
+        hashes = np.load(os.path.join(path, HASHES_FILE), mmap_mode=mmap_mode)
+        sources = np.load(os.path.join(path, SOURCES_FILE), mmap_mode=mmap_mode)
+        stats = np.load(os.path.join(path, STATS_FILE), mmap_mode=mmap_mode)
+    except (OSError, ValueError) as e:
+        raise GalleryFormatError(f"Corrupt gallery arrays at {path}: {e}")
+
+    if not (len(ids) == len(hashes) == len(sources) == len(stats) == embeddings.shape[0] == header['count']):
+        raise GalleryFormatError(f"Gallery at {path} has mismatched array lengths")
+
+    return FaceGallery(header, embeddings, ids, hashes, sources, stats)
+
+
+def _add_source_stats(path):
+    """Version 1 to 2: add sources.npy and stats.npy with unknown values, so each photo is hashed once more."""
+    header = read_header(path)
+    np.save(os.path.join(path, SOURCES_FILE), np.asarray([''] * header['count'], dtype=str))
+    np.save(os.path.join(path, STATS_FILE), np.asarray([UNKNOWN_STAT] * header['count'], dtype=np.int64).reshape(-1, 2))
+
+    header['version'] = 2
+    fd, header_path = tempfile.mkstemp(prefix=f"{HEADER_FILE}.", dir=path)
+    with os.fdopen(fd, 'w') as header_file:
+        json.dump(header, header_file)
+    os.replace(header_path, os.path.join(path, HEADER_FILE))
+
+
+# Migration steps keyed by the version they upgrade *from*. Each step takes
+# the gallery path, rewrites it in the next version's layout and returns
+# nothing; load_gallery() applies them in order until the gallery is current.
+GALLERY_MIGRATIONS = {
+    1: _add_source_stats,
+}
+
+
+def migrate_gallery(path):
+    """Upgrade a gallery in place to GALLERY_FORMAT_VERSION."""
+    version = read_header(path)['version']
+
+    if version > GALLERY_FORMAT_VERSION:
+        raise GalleryFormatError(
+            f"Gallery at {path} is version {version}, newer than supported version {GALLERY_FORMAT_VERSION}"
+        )
+
+    while version < GALLERY_FORMAT_VERSION:
+        step = GALLERY_MIGRATIONS.get(version)
+        if step is None:
+            raise GalleryFormatError(f"No migration from gallery version {version}; rebuild the gallery")
+        step(path)
+        version = read_header(path)['version']
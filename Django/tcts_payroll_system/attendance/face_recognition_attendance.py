@@ -3,8 +3,56 @@ import cv2
 import face_recognition
 from django.core.exceptions import ValidationError
 from datetime import date, datetime, time, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
+from django.conf import settings
 from payroll_system.models import Employee, Attendance 
+from .face_gallery import GalleryFormatError, gallery_lock, hash_image_file, image_stat, load_gallery, save_gallery
+
+def encode_employee_image(employee, image_path):
+    """Detect the largest face in an employee's photo and return its encoding (or None)."""
+    return encode_face_image(employee.employee_id, image_path)
+
+def encode_face_image(employee_id, image_path):
+    """encode_employee_image() by id, so it can run in a worker process without a model instance."""
+    # Load the image directly without resizing at first
+    image = cv2.imread(image_path)
+    if image is None:
+        print(f"Failed to load image for employee {employee_id}")
+        return None
+    
+    # Convert to RGB (face_recognition uses RGB)
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
+    # Try to detect faces using HOG model
+    face_locations = face_recognition.face_locations(rgb_image, model="hog")
+    
+    if not face_locations:
+        print(f"No face detected in image for employee {employee_id}")
+        # Try using CNN model as a fallback (more accurate but slower)
+        face_locations = face_recognition.face_locations(rgb_image, model="cnn")
+        
+        if not face_locations:
+            print(f"Still no face detected using CNN model for employee {employee_id}")
+            return None
+    
+    # Get the largest face by area
+    largest_face = max(face_locations, key=lambda rect: (rect[2]-rect[0])*(rect[3]-rect[1]))
+    
+    # Create encoding
+    encodings = face_recognition.face_encodings(rgb_image, [largest_face])
+    if not encodings:
+        print(f"Failed to encode face for employee {employee_id}")
+        return None
+    return encodings[0]
+
+def _load_saved_gallery():
+    """Load the persisted face gallery, or None if there is no usable one."""
+    try:
+        return load_gallery(settings.FACE_GALLERY_DIR)
+    except GalleryFormatError as e:
+        print(f"Face gallery not loaded: {e}")
+        return None
 
 # Cache the face encodings to avoid reloading them for every frame
 @lru_cache(maxsize=1)
@@ -15,54 +63,150 @@ def load_registered_faces():
     
     print("Loading registered faces...")
     
-    for employee in employees:
-        if employee.employee_image:
-            try:
-                image_path = employee.employee_image.path
-                
-                if os.path.exists(image_path):
-                    # Load the image directly without resizing at first
-                    image = cv2.imread(image_path)
-                    if image is None:
-                        print(f"Failed to load image for employee {employee.employee_id}")
-                        continue
-                    
-                    # Convert to RGB (face_recognition uses RGB)
-                    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    
-                    # Try to detect faces using HOG model
-                    face_locations = face_recognition.face_locations(rgb_image, model="hog")
+    # Held until the refreshed gallery is saved, so a concurrent enrollment is not overwritten
+    with gallery_lock(settings.FACE_GALLERY_DIR):
+        # Reuse embeddings from the saved gallery for photos that have not changed
+        gallery = _load_saved_gallery()
+        saved_rows = {}
+        if gallery is not None:
+            saved_rows = {int(employee_id): row for row, employee_id in enumerate(gallery.ids)}
+        
+        gallery_ids = []
+        gallery_hashes = []
+        gallery_embeddings = []
+        gallery_sources = []
+        gallery_stats = []
+        gallery_changed = gallery is None
+        
+        for employee in employees:
+            if employee.employee_image:
+                try:
+                    image_path = employee.employee_image.path
                     
-                    if not face_locations:
-                        print(f"No face detected in image for employee {employee.employee_id}")
-                        # Try using CNN model as a fallback (more accurate but slower)
-                        face_locations = face_recognition.face_locations(rgb_image, model="cnn")
+                    if os.path.exists(image_path):
+                        stat = image_stat(image_path)
+                        row = saved_rows.get(employee.employee_id)
                         
-                        if not face_locations:
-                            print(f"Still no face detected using CNN model for employee {employee.employee_id}")
-                            continue
-                    
-                    # Get the largest face by area
-                    largest_face = max(face_locations, key=lambda rect: (rect[2]-rect[0])*(rect[3]-rect[1]))
-                    
-                    # Create encoding
-                    encodings = face_recognition.face_encodings(rgb_image, [largest_face])
-
-                    if encodings:
-                        employee_id = str(employee.employee_id)
-                        registered_faces[employee_id] = encodings[0]
-                        employee_names[employee_id] = f"{employee.first_name} {employee.last_name}"
-                        print(f"Successfully loaded face for {employee_names[employee_id]}")
+                        if row is not None and gallery.is_unchanged(row, image_path, stat):
+                            # Same file, size and modification time: no need to read the photo
+                            image_hash = gallery.hashes[row].decode()
+                            encoding = gallery.embeddings[row]
+                        else:
+                            image_hash = hash_image_file(image_path)
+                            if row is not None and gallery.hashes[row].decode() == image_hash:
+                                encoding = gallery.embeddings[row]
+                            else:
+                                encoding = encode_employee_image(employee, image_path)
+                            # Saved again with the new stats, so the next load skips the hash
+                            gallery_changed = True
+                        
+                        if encoding is not None:
+                            employee_id = str(employee.employee_id)
+                            registered_faces[employee_id] = encoding
+                            employee_names[employee_id] = f"{employee.first_name} {employee.last_name}"
+                            gallery_ids.append(employee.employee_id)
+                            gallery_hashes.append(image_hash)
+                            gallery_embeddings.append(encoding)
+                            gallery_sources.append(image_path)
+                            gallery_stats.append(stat)
+                            print(f"Successfully loaded face for {employee_names[employee_id]}")
                     else:
-                        print(f"Failed to encode face for employee {employee.employee_id}")
-                else:
-                    print(f"Image path does not exist: {image_path}")
-            except Exception as e:
-                print(f"Error processing image for employee {employee.employee_id}: {str(e)}")
+                        print(f"Image path does not exist: {image_path}")
+                except Exception as e:
+                    print(f"Error processing image for employee {employee.employee_id}: {str(e)}")
+        
+        # Persist the gallery again if any embedding was added, changed or removed
+        if gallery_changed or len(gallery_ids) != len(saved_rows):
+            try:
+                save_gallery(
+                    settings.FACE_GALLERY_DIR,
+                    gallery_ids,
+                    gallery_embeddings,
+                    gallery_hashes,
+                    dtype=settings.FACE_GALLERY_DTYPE,
+                    sources=gallery_sources,
+                    stats=gallery_stats,
+                )
+            except (OSError, GalleryFormatError) as e:
+                print(f"Failed to save face gallery: {e}")
     
     print(f"Loaded {len(registered_faces)} face encodings")
     return registered_faces, employee_names
 
+def _encode_enrollment_photo(job):
+    """Worker for enroll_employees(): returns (employee_id, image_hash, image_stat, encoding or None)."""
+    employee_id, image_path = job
+    try:
+        stat = image_stat(image_path)
+        return employee_id, hash_image_file(image_path), stat, encode_face_image(employee_id, image_path)
+    except Exception as e:
+        print(f"Error processing image for employee {employee_id}: {str(e)}")
+        return employee_id, None, None, None
+
+def enroll_employees(employees, workers=None):
+    """
+    Encode the photos of many employees in a pool of worker processes and add
+    them to the saved face gallery in a single write.
+    Returns the set of employee ids whose face was enrolled.
+    """
+    jobs = []
+    for employee in employees:
+        if employee.employee_image and os.path.exists(employee.employee_image.path):
+            jobs.append((employee.employee_id, employee.employee_image.path))
+    if not jobs:
+        return set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_encode_enrollment_photo, jobs, chunksize=max(1, len(jobs) // 32)))
+
+    sources = dict(jobs)
+    enrolled = {
+        employee_id: (image_hash, stat, encoding)
+        for employee_id, image_hash, stat, encoding in results if encoding is not None
+    }
+
+    # Encoding ran without the lock; only the merge into the saved gallery holds it
+    with gallery_lock(settings.FACE_GALLERY_DIR):
+        # Keep the saved rows for everyone else and append the new encodings
+        gallery_ids = []
+        gallery_hashes = []
+        gallery_embeddings = []
+        gallery_sources = []
+        gallery_stats = []
+        gallery = _load_saved_gallery()
+        if gallery is not None:
+            for row, employee_id in enumerate(gallery.ids):
+                if int(employee_id) not in enrolled:
+                    gallery_ids.append(int(employee_id))
+                    gallery_hashes.append(gallery.hashes[row].decode())
+                    gallery_embeddings.append(gallery.embeddings[row])
+                    gallery_sources.append(str(gallery.sources[row]))
+                    gallery_stats.append(gallery.stats[row])
+
+        for employee_id, (image_hash, stat, encoding) in enrolled.items():
+            gallery_ids.append(employee_id)
+            gallery_hashes.append(image_hash)
+            gallery_embeddings.append(encoding)
+            gallery_sources.append(sources[employee_id])
+            gallery_stats.append(stat)
+
+        try:
+            save_gallery(
+                settings.FACE_GALLERY_DIR,
+                gallery_ids,
+                gallery_embeddings,
+                gallery_hashes,
+                dtype=settings.FACE_GALLERY_DTYPE,
+                sources=gallery_sources,
+                stats=gallery_stats,
+            )
+        except (OSError, GalleryFormatError) as e:
+            print(f"Failed to save face gallery: {e}")
+
+    # The next recognition request reloads the faces from the updated gallery
+    load_registered_faces.cache_clear()
+    return set(enrolled)
+
 def compare_faces(known_encoding, captured_encoding):
     """
     Compare face encodings with improved matching logic
@@ -233,31 +377,17 @@ def mark_attendance(employee, action):
                 'message': f'Cannot time in after {WORK_END_TIME.strftime("%I:%M %p")}. Work hours end at {WORK_END_TIME.strftime("%I:%M %p")}.'
             }
             
-        # Check if employee already has an active session
-        today_attendance = Attendance.objects.filter(
-            employee=employee, 
-            date=today,
-            time_in__isnull=False,
-            time_out__isnull=True
-        ).first()
-        
-        if today_attendance:
-            # Already has an open session
-            return {
-                'status': 'success',
-                'message': f'Already timed in at {today_attendance.time_in.strftime("%I:%M %p")}.',
-                'has_open_session': True
-            }
-        
         try:
-            # Create new attendance record
-            attendance = Attendance(
-                employee=employee,
-                date=today,
-                time_in=current_time,
-                attendance_status=Attendance.AttendanceStatus.PRESENT
-            )
-            attendance.save()
+            # Open a session atomically; a concurrent or repeated punch gets the existing one
+            attendance, created = Attendance.clock_in(employee, today, current_time)
+            
+            if not created:
+                # Already has an open session
+                return {
+                    'status': 'success',
+                    'message': f'Already timed in at {attendance.time_in.strftime("%I:%M %p")}.',
+                    'has_open_session': True
+                }
             
             return {
                 'status': 'success',
@@ -288,13 +418,8 @@ def mark_attendance(employee, action):
             }
             
         try:
-            # Find today's attendance record with an open session
-            today_attendance = Attendance.objects.filter(
-                employee=employee, 
-                date=today,
-                time_in__isnull=False,
-                time_out__isnull=True
-            ).first()
+            # Close today's open session with a conditional update
+            today_attendance = Attendance.clock_out(employee, today, current_time)
             
             if not today_attendance:
                 return {
@@ -302,13 +427,6 @@ def mark_attendance(employee, action):
                     'message': 'No active session found to time out from.'
                 }
             
-            # Record time out
-            today_attendance.time_out = current_time
-            today_attendance.save()
-            
-            # Calculate hours worked
-            today_attendance.calculate_hours_worked()
-            
             # Format the time for display
             formatted_hours = today_attendance.get_formatted_hours_worked()
             
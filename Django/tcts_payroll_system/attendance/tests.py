@@ -1,3 +1,69 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+from django.test import SimpleTestCase
+from .face_gallery import (
+    GALLERY_FORMAT_VERSION, GalleryFormatError, gallery_lock, hash_image_file, image_stat, load_gallery, save_gallery,
+)
 
-# Create your tests here.
+
+class FaceGalleryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'face_gallery')
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_version_1_gallery_is_migrated(self):
+        # Unversioned layout without source paths or stats
+        os.makedirs(self.path)
+        np.save(os.path.join(self.path, 'embeddings.npy'), np.ones((2, 4), dtype='float32'))
+        np.save(os.path.join(self.path, 'ids.npy'), np.array([1, 2], dtype=np.int64))
+        np.save(os.path.join(self.path, 'hashes.npy'), np.array([b'a' * 40, b'b' * 40], dtype='S40'))
+        with open(os.path.join(self.path, 'header.json'), 'w') as header_file:
+            json.dump({'version': 1, 'dtype': 'float32', 'dim': 4, 'count': 2}, header_file)
+
+        gallery = load_gallery(self.path)
+
+        self.assertEqual(gallery.header['version'], GALLERY_FORMAT_VERSION)
+        self.assertEqual(len(gallery.sources), 2)
+        # Migrated rows match no file, so each photo is hashed once more
+        self.assertFalse(gallery.is_unchanged(0, '', (0, 0)))
+
+    def test_unchanged_photo_is_recognised_by_its_stats(self):
+        image_path = os.path.join(self.root, 'photo.jpg')
+        with open(image_path, 'wb') as image_file:
+            image_file.write(b'photo')
+        stat = image_stat(image_path)
+        save_gallery(self.path, [1], [np.zeros(4)], [hash_image_file(image_path)], sources=[image_path], stats=[stat])
+
+        gallery = load_gallery(self.path)
+        self.assertTrue(gallery.is_unchanged(0, image_path, image_stat(image_path)))
+
+        os.utime(image_path, ns=(stat[0] + 10 ** 9, stat[0] + 10 ** 9))
+        self.assertFalse(gallery.is_unchanged(0, image_path, image_stat(image_path)))
+        self.assertFalse(gallery.is_unchanged(0, image_path + '.new', stat))
+
+    def test_locked_updates_keep_every_entry(self):
+        def enroll(first_id):
+            for employee_id in range(first_id, first_id + 10):
+                with gallery_lock(self.path):
+                    try:
+                        gallery = load_gallery(self.path, mmap=False)
+                        ids, embeddings, hashes = list(gallery.ids), list(gallery.embeddings), list(gallery.hashes)
+                    except GalleryFormatError:
+                        ids, embeddings, hashes = [], [], []
+                    save_gallery(self.path, ids + [employee_id], embeddings + [np.zeros(4)], hashes + [b'c' * 40])
+
+        threads = [threading.Thread(target=enroll, args=(first_id,)) for first_id in (0, 100, 200, 300)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(load_gallery(self.path)), 40)
@@ -0,0 +1,138 @@
+import calendar
+from datetime import date as date_class
+from django.core.cache import cache
+from django.db.models import Count, Min, OuterRef, Prefetch, Q, Subquery, Sum
+from django.utils import timezone
+from django.utils.timezone import timedelta
+from .models import Employee, Attendance, DailyAttendanceSummary, PayrollPeriod, PayrollRecord, History
+
+# Cache key and lifetime (in seconds) for the dashboard data
+DASHBOARD_CACHE_KEY = 'payroll_system:dashboard'
+DASHBOARD_CACHE_TTL = 30
+
+# Number of entries shown in the "Recent history" feed
+DASHBOARD_HISTORY_LIMIT = 20
+
+
+def _employees_with_current_record(current_payroll_period):
+    """
+    Employees ordered by their latest attendance, each with `payroll_record` set to
+    their record in the current period (or None), using one prefetch query.
+    """
+    latest_attendance_subquery = (
+        Attendance.objects
+        .filter(employee=OuterRef('pk'))
+        .order_by('-date')
+        .values('date')[:1]
+    )
+
+    employees = Employee.objects.annotate(
+        latest_attendance_date=Subquery(latest_attendance_subquery)
+    ).order_by('-latest_attendance_date', 'last_name')  # Order by most recent attendance date
+
+    if current_payroll_period:
+        employees = employees.prefetch_related(Prefetch(
+            'payroll_records',
+            queryset=PayrollRecord.objects.filter(payroll_period=current_payroll_period),
+            to_attr='current_payroll_records'
+        ))
+
+    employees = list(employees)
+    for employee in employees:
+        current_records = getattr(employee, 'current_payroll_records', [])
+        employee.payroll_record = current_records[0] if current_records else None
+    return employees
+
+
+def _payroll_totals(today):
+    """Weekly, monthly and yearly net pay totals in one conditional aggregate."""
+    week_start = today - timedelta(days=today.weekday())  # Monday of current week
+    week_end = week_start + timedelta(days=6)  # Sunday of current week
+
+    month_start = date_class(today.year, today.month, 1)  # First day of current month
+    last_day_of_month = calendar.monthrange(today.year, today.month)[1]
+    month_end = date_class(today.year, today.month, last_day_of_month)  # Last day of current month
+
+    year_start = date_class(today.year, 1, 1)  # First day of current year
+    year_end = date_class(today.year, 12, 31)  # Last day of current year
+
+    def in_range(start, end):
+        return Q(payroll_period__start_date__gte=start, payroll_period__end_date__lte=end)
+
+    week, month, year = in_range(week_start, week_end), in_range(month_start, month_end), in_range(year_start, year_end)
+
+    # The week can start in the previous year, so the base filter covers all three ranges
+    totals = PayrollRecord.objects.filter(week | month | year).aggregate(
+        weekly_payroll=Sum('net_pay', filter=week),
+        monthly_payroll=Sum('net_pay', filter=month),
+        yearly_payroll=Sum('net_pay', filter=year),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def build_dashboard_context():
+    """Compute the dashboard data straight from the database in a fixed number of queries."""
+    today = timezone.now().date()
+    start_of_week = today - timedelta(days=today.weekday())  # Get Monday of current week
+    end_of_week = start_of_week + timedelta(days=6)  # Get Sunday of current week
+
+    # Get the current active payroll period
+    current_payroll_period = PayrollPeriod.objects.filter(
+        payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS
+    ).first()
+
+    employees = _employees_with_current_record(current_payroll_period)
+
+    employee_counts = Employee.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+    )
+
+    # Unique active employees present this week and today, from this week's daily summary rows
+    attendance_counts = DailyAttendanceSummary.objects.filter(
+        date__range=[start_of_week, end_of_week],
+        present=True,
+        employee__is_active=True
+    ).aggregate(
+        week=Count('employee', distinct=True),
+        today=Count('pk', filter=Q(date=today)),
+    )
+
+    # Payroll periods grouped by status, plus the next payday
+    period_counts = PayrollPeriod.objects.aggregate(
+        processed=Count('pk', filter=Q(payroll_status=PayrollPeriod.PayrollStatus.PROCESSED)),
+        pending=Count('pk', filter=Q(payroll_status=PayrollPeriod.PayrollStatus.PENDING)),
+        next_payday=Min('payment_date', filter=Q(payment_date__gt=today)),
+    )
+
+    payroll_totals = _payroll_totals(today)
+
+    histories = list(History.objects.order_by('-date_time')[:DASHBOARD_HISTORY_LIMIT])
+
+    present_count = attendance_counts['today']
+
+    return {
+        'histories': histories,
+        'employees': employees,
+        'total_employees': employee_counts['total'],
+        'avg_active_employees': round(attendance_counts['week']),
+        'processed_payroll_count': period_counts['processed'],
+        'pending_payroll_count': period_counts['pending'],
+        'next_payday': period_counts['next_payday'],
+        'total_payroll': payroll_totals['monthly_payroll'],
+        'weekly_payroll': payroll_totals['weekly_payroll'],
+        'monthly_payroll': payroll_totals['monthly_payroll'],
+        'yearly_payroll': payroll_totals['yearly_payroll'],
+        'present_count': present_count,
+        # Absentees = all active employees MINUS those present today
+        'absent_count': employee_counts['active'] - present_count,
+    }
+
+
+def get_dashboard_context():
+    """Return the dashboard data, served from the cache for up to DASHBOARD_CACHE_TTL seconds."""
+    context = cache.get(DASHBOARD_CACHE_KEY)
+    if context is None:
+        context = build_dashboard_context()
+        cache.set(DASHBOARD_CACHE_KEY, context, DASHBOARD_CACHE_TTL)
+    return context
@@ -0,0 +1,247 @@
+"""
+Bulk employee import from a CSV file plus an optional zip of photos.
+
+Each CSV row describes one employee using the registration form's fields,
+with locations given by name (as in the registration dropdowns) and a
+`photo` column naming an image inside the zip. Rows are validated in batch,
+locations are resolved through the in-memory location index, valid
+employees and their payroll records are bulk created, and their faces are
+enrolled in a pool of worker processes.
+"""
+import csv
+import io
+import os
+import zipfile
+from collections import defaultdict
+from django.core.files.base import ContentFile
+from .locations import get_location_index
+from .models import Employee, History
+
+IMPORT_COLUMNS = [
+    'first_name', 'middle_name', 'last_name', 'gender', 'date_of_birth', 'contact_number', 'emergency_contact',
+    'region', 'province', 'city', 'barangay', 'highest_education', 'work_experience', 'daily_rate',
+    'date_of_employment', 'employee_status', 'photo',
+]
+
+# Same required fields as EmployeeForm, plus the photo
+REQUIRED_COLUMNS = [
+    'first_name', 'last_name', 'gender', 'date_of_birth', 'contact_number', 'emergency_contact',
+    'highest_education', 'date_of_employment', 'employee_status', 'region', 'province', 'city', 'barangay', 'photo',
+]
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Refuse photos larger than this before reading them out of the zip
+MAX_PHOTO_SIZE = 5 * 1024 * 1024
+
+
+class ImportFileError(Exception):
+    """Raised when the CSV or zip file as a whole cannot be read."""
+
+
+def read_rows(csv_file):
+    """Read the CSV (path, bytes or text file object) into a list of dicts with stripped values."""
+    if isinstance(csv_file, (str, os.PathLike)):
+        with open(csv_file, newline='', encoding='utf-8-sig') as f:
+            return read_rows(f)
+
+    content = csv_file.read()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFileError("The CSV file must be UTF-8 encoded.")
+
+    reader = csv.DictReader(io.StringIO(content))
+    missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        raise ImportFileError(f"The CSV file is missing columns: {', '.join(sorted(missing))}")
+
+    return [
+        {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+        for row in reader
+    ]
+
+
+def open_photos(photos_zip):
+    """
+    Map lowercased base file names to the zip entries with that name, for every
+    image in the archive. The CSV names photos by file name only, so a name
+    with more than one entry (the same file name in different folders) is ambiguous.
+    """
+    if photos_zip is None:
+        return None, {}
+
+    try:
+        archive = zipfile.ZipFile(photos_zip)
+    except zipfile.BadZipFile:
+        raise ImportFileError("The photos file is not a valid zip archive.")
+
+    photos = defaultdict(list)
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if not info.is_dir() and name.lower().endswith(IMAGE_EXTENSIONS):
+            photos[name.lower()].append(info)
+    return archive, dict(photos)
+
+
+def resolve_locations(row):
+    """
+    Resolve a row's region, province, city and barangay names through the location
+    index, with the same rules as EmployeeForm: each level must belong to the one above it.
+    Returns (region, province, city, barangay, error).
+    """
+    index = get_location_index()
+
+    region = index.region(row['region'])
+    if not region:
+        return None, None, None, None, f"Unknown region: {row['region']}"
+
+    province = index.province(row['province'], region.regCode)
+    if not province:
+        return None, None, None, None, "Province must belong to the selected region."
+
+    city = index.city(row['city'], province.provCode)
+    if not city:
+        return None, None, None, None, "City must belong to the selected province."
+
+    barangay = index.barangay(row['barangay'], city.citymunCode)
+    if not barangay:
+        return None, None, None, None, "Barangay must belong to the selected city."
+
+    return region, province, city, barangay, None
+
+
+def validation_messages(error):
+    """Flatten a ValidationError into 'field: message' strings."""
+    if hasattr(error, 'error_dict'):
+        return [
+            f"{field}: {message}" if field != '__all__' else message
+            for field, messages in error.message_dict.items()
+            for message in messages
+        ]
+    return list(error.messages)
+
+
+def import_employees(csv_file, photos_zip=None, enroll_faces=True, workers=None):
+    """
+    Import employees from `csv_file`, with photos taken from `photos_zip`.
+
+    Returns one report entry per CSV row, in file order, as a dict with the
+    row number (counting the header as row 1), the employee's name, a status
+    of 'created' or 'error', the new employee_id, any error messages and
+    whether the face was enrolled.
+    """
+    rows = read_rows(csv_file)
+    archive, photos = open_photos(photos_zip)
+
+    report = [
+        {
+            'row': number,
+            'name': f"{row['first_name']} {row['last_name']}".strip(),
+            'status': 'error',
+            'employee_id': None,
+            'errors': [],
+            'face_enrolled': False,
+        }
+        for number, row in enumerate(rows, start=2)
+    ]
+
+    employees = []
+    employee_rows = []
+    try:
+        for index, row in enumerate(rows):
+            entry = report[index]
+
+            missing = [column for column in REQUIRED_COLUMNS if not row[column]]
+            if missing:
+                entry['errors'].append(f"Missing values: {', '.join(missing)}")
+                continue
+
+            region, province, city, barangay, location_error = resolve_locations(row)
+            if location_error:
+                entry['errors'].append(location_error)
+                continue
+
+            matches = photos.get(row['photo'].lower(), [])
+            if not matches:
+                entry['errors'].append(f"Photo {row['photo']} was not found in the zip file.")
+                continue
+            if len(matches) > 1:
+                paths = ', '.join(info.filename for info in matches)
+                entry['errors'].append(f"Photo {row['photo']} matches more than one file in the zip file: {paths}")
+                continue
+            photo = matches[0]
+            if photo.file_size > MAX_PHOTO_SIZE:
+                entry['errors'].append("employee_image: Image size cannot exceed 5MB.")
+                continue
+
+            employees.append(Employee(
+                first_name=row['first_name'],
+                middle_name=row['middle_name'] or None,
+                last_name=row['last_name'],
+                gender=row['gender'],
+                date_of_birth=row['date_of_birth'],
+                contact_number=row['contact_number'],
+                emergency_contact=row['emergency_contact'],
+                region=region,
+                province=province,
+                city=city,
+                barangay=barangay,
+                highest_education=row['highest_education'],
+                work_experience=row['work_experience'] or None,
+                daily_rate=row['daily_rate'] or 0,
+                date_of_employment=row['date_of_employment'],
+                employee_status=row['employee_status'],
+                is_active=True,
+                employee_image=ContentFile(archive.read(photo), name=os.path.basename(photo.filename)),
+            ))
+            employee_rows.append(index)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    created, errors = Employee.objects.bulk_import(employees)
+
+    for position, error in errors.items():
+        report[employee_rows[position]]['errors'].extend(validation_messages(error))
+
+    # bulk_import returns the created employees in input order, skipping rejected ones
+    created_iter = iter(created)
+    created_by_row = {}
+    for position, index in enumerate(employee_rows):
+        if position not in errors:
+            employee = next(created_iter)
+            report[index]['status'] = 'created'
+            report[index]['employee_id'] = employee.employee_id
+            created_by_row[index] = employee
+
+    if created:
+        History.objects.create(description=f"{len(created)} employees were added by bulk import.")
+
+    if enroll_faces and created:
+        # Imported lazily: the recognizer pulls in face_recognition and OpenCV
+        from attendance.face_recognition_attendance import enroll_employees
+
+        enrolled = enroll_employees(created, workers=workers)
+        for index, employee in created_by_row.items():
+            report[index]['face_enrolled'] = employee.employee_id in enrolled
+            if not report[index]['face_enrolled']:
+                report[index]['errors'].append("No face could be enrolled from the photo.")
+
+    return report
+
+
+def write_report(report, output):
+    """Write the per-row import report as CSV to a text file object."""
+    writer = csv.writer(output)
+    writer.writerow(['row', 'name', 'status', 'employee_id', 'face_enrolled', 'errors'])
+    for entry in report:
+        writer.writerow([
+            entry['row'],
+            entry['name'],
+            entry['status'],
+            entry['employee_id'] or '',
+            'yes' if entry['face_enrolled'] else 'no',
+            '; '.join(entry['errors']),
+        ])
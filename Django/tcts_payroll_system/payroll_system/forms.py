@@ -5,9 +5,90 @@ from django.forms import ModelForm
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from datetime import datetime, timedelta
-from .models import Employee, PayrollPeriod, Deduction, Region, Province, City, Barangay, Service, Customer, Vehicle
+from .locations import get_location_index
+from .models import Employee, PayrollPeriod, Deduction, Service, Customer, Vehicle
 
-class EmployeeForm(forms.ModelForm):
+class LocationFieldsMixin:
+    """
+    Region, province, city and barangay name fields validated against the
+    in-memory location index (see locations.py) instead of per-field queries.
+    """
+
+    def clean_region(self):
+        region_name = self.cleaned_data.get('region')
+        if not region_name:
+            raise forms.ValidationError("Region is required.")
+            
+        if not get_location_index().region(region_name):
+            raise forms.ValidationError("Please select a valid region.")
+            
+        return region_name
+    
+    def clean_province(self):
+        province_name = self.cleaned_data.get('province')
+        region_name = self.cleaned_data.get('region')
+        
+        if not province_name:
+            raise forms.ValidationError("Province is required.")
+            
+        if region_name:
+            index = get_location_index()
+            region = index.region(region_name)
+            if region and not index.province(province_name, region.regCode):
+                raise forms.ValidationError("Province must belong to the selected region.")
+        
+        return province_name
+    
+    def clean_city(self):
+        city_name = self.cleaned_data.get('city')
+        province_name = self.cleaned_data.get('province')
+        
+        if not city_name:
+            raise forms.ValidationError("City is required.")
+            
+        if province_name:
+            index = get_location_index()
+            province = index.province(province_name)
+            if province and not index.city(city_name, province.provCode):
+                raise forms.ValidationError("City must belong to the selected province.")
+        
+        return city_name
+    
+    def clean_barangay(self):
+        barangay_name = self.cleaned_data.get('barangay')
+        city_name = self.cleaned_data.get('city')
+        
+        if not barangay_name:
+            raise forms.ValidationError("Barangay is required.")
+            
+        if city_name:
+            index = get_location_index()
+            city = index.city(city_name)
+            if city and not index.barangay(barangay_name, city.citymunCode):
+                raise forms.ValidationError("Barangay must belong to the selected city.")
+        
+        return barangay_name
+
+    def set_locations(self, instance):
+        """Set the instance's location fields from the validated names, each within the level above."""
+        locations = get_location_index().resolve(
+            self.cleaned_data.get('region'),
+            self.cleaned_data.get('province'),
+            self.cleaned_data.get('city'),
+            self.cleaned_data.get('barangay')
+        )
+        for field, location in zip(('region', 'province', 'city', 'barangay'), locations):
+            if location:
+                setattr(instance, field, location)
+
+    def _post_clean(self):
+        # The location fields are not model form fields, so resolve them onto the instance
+        # before ModelForm runs the model's full_clean(); its location checks then see the
+        # values that save() will write
+        self.set_locations(self.instance)
+        super()._post_clean()
+
+class EmployeeForm(LocationFieldsMixin, forms.ModelForm):
     first_name = forms.CharField(widget=forms.TextInput())
     middle_name = forms.CharField(widget=forms.TextInput(), required=False)
     last_name = forms.CharField(widget=forms.TextInput())
@@ -135,77 +216,6 @@ class EmployeeForm(forms.ModelForm):
             
         return emergency_contact
     
-    def clean_region(self):
-        region_name = self.cleaned_data.get('region')
-        if not region_name:
-            raise forms.ValidationError("Region is required.")
-            
-        region = Region.objects.filter(regDesc=region_name).first()
-        if not region:
-            raise forms.ValidationError("Please select a valid region.")
-            
-        return region_name
-    
-    def clean_province(self):
-        province_name = self.cleaned_data.get('province')
-        region_name = self.cleaned_data.get('region')
-        
-        if not province_name:
-            raise forms.ValidationError("Province is required.")
-            
-        if region_name:
-            region = Region.objects.filter(regDesc=region_name).first()
-            if region:
-                province = Province.objects.filter(
-                    provDesc=province_name,
-                    regCode=region.regCode
-                ).first()
-                
-                if not province:
-                    raise forms.ValidationError("Province must belong to the selected region.")
-        
-        return province_name
-    
-    def clean_city(self):
-        city_name = self.cleaned_data.get('city')
-        province_name = self.cleaned_data.get('province')
-        
-        if not city_name:
-            raise forms.ValidationError("City is required.")
-            
-        if province_name:
-            province = Province.objects.filter(provDesc=province_name).first()
-            if province:
-                city = City.objects.filter(
-                    citymunDesc=city_name,
-                    provCode=province.provCode
-                ).first()
-                
-                if not city:
-                    raise forms.ValidationError("City must belong to the selected province.")
-        
-        return city_name
-    
-    def clean_barangay(self):
-        barangay_name = self.cleaned_data.get('barangay')
-        city_name = self.cleaned_data.get('city')
-        
-        if not barangay_name:
-            raise forms.ValidationError("Barangay is required.")
-            
-        if city_name:
-            city = City.objects.filter(citymunDesc=city_name).first()
-            if city:
-                barangay = Barangay.objects.filter(
-                    brgyDesc=barangay_name,
-                    citymunCode=city.citymunCode
-                ).first()
-                
-                if not barangay:
-                    raise forms.ValidationError("Barangay must belong to the selected city.")
-        
-        return barangay_name
-    
     def clean_work_experience(self):
         work_experience = self.cleaned_data.get('work_experience', '')
         if work_experience and len(work_experience) > 1000:
@@ -251,30 +261,16 @@ class EmployeeForm(forms.ModelForm):
         return cleaned_data
     
     def save(self, commit=True):
+        # The locations were set and validated with the rest of the instance in _post_clean()
         employee = super().save(commit=False)
         
-        # Set location fields based on validated data
-        region_name = self.cleaned_data.get('region')
-        province_name = self.cleaned_data.get('province')
-        city_name = self.cleaned_data.get('city')
-        barangay_name = self.cleaned_data.get('barangay')
-        
-        region = Region.objects.filter(regDesc=region_name).first()
-        province = Province.objects.filter(provDesc=province_name, regCode=region.regCode).first()
-        city = City.objects.filter(citymunDesc=city_name, provCode=province.provCode).first()
-        barangay = Barangay.objects.filter(brgyDesc=barangay_name, citymunCode=city.citymunCode).first()
-        
-        employee.region = region
-        employee.province = province
-        employee.city = city
-        employee.barangay = barangay
-        
         if commit:
-            employee.save()
+            # is_valid() already ran the model's full_clean()
+            employee.save(validate=False)
         
         return employee
     
-class EmployeeEditForm(forms.ModelForm):
+class EmployeeEditForm(LocationFieldsMixin, forms.ModelForm):
     first_name = forms.CharField(widget=forms.TextInput())
     middle_name = forms.CharField(widget=forms.TextInput(), required=False)
     last_name = forms.CharField(widget=forms.TextInput())
@@ -430,77 +426,6 @@ class EmployeeEditForm(forms.ModelForm):
             
         return emergency_contact
     
-    def clean_region(self):
-        region_name = self.cleaned_data.get('region')
-        if not region_name:
-            raise forms.ValidationError("Region is required.")
-            
-        region = Region.objects.filter(regDesc=region_name).first()
-        if not region:
-            raise forms.ValidationError("Please select a valid region.")
-            
-        return region_name
-    
-    def clean_province(self):
-        province_name = self.cleaned_data.get('province')
-        region_name = self.cleaned_data.get('region')
-        
-        if not province_name:
-            raise forms.ValidationError("Province is required.")
-            
-        if region_name:
-            region = Region.objects.filter(regDesc=region_name).first()
-            if region:
-                province = Province.objects.filter(
-                    provDesc=province_name,
-                    regCode=region.regCode
-                ).first()
-                
-                if not province:
-                    raise forms.ValidationError("Province must belong to the selected region.")
-        
-        return province_name
-    
-    def clean_city(self):
-        city_name = self.cleaned_data.get('city')
-        province_name = self.cleaned_data.get('province')
-        
-        if not city_name:
-            raise forms.ValidationError("City is required.")
-            
-        if province_name:
-            province = Province.objects.filter(provDesc=province_name).first()
-            if province:
-                city = City.objects.filter(
-                    citymunDesc=city_name,
-                    provCode=province.provCode
-                ).first()
-                
-                if not city:
-                    raise forms.ValidationError("City must belong to the selected province.")
-        
-        return city_name
-    
-    def clean_barangay(self):
-        barangay_name = self.cleaned_data.get('barangay')
-        city_name = self.cleaned_data.get('city')
-        
-        if not barangay_name:
-            raise forms.ValidationError("Barangay is required.")
-            
-        if city_name:
-            city = City.objects.filter(citymunDesc=city_name).first()
-            if city:
-                barangay = Barangay.objects.filter(
-                    brgyDesc=barangay_name,
-                    citymunCode=city.citymunCode
-                ).first()
-                
-                if not barangay:
-                    raise forms.ValidationError("Barangay must belong to the selected city.")
-        
-        return barangay_name
-    
     def clean_work_experience(self):
         work_experience = self.cleaned_data.get('work_experience', '')
         if work_experience and len(work_experience) > 1000:
@@ -546,45 +471,12 @@ class EmployeeEditForm(forms.ModelForm):
         return cleaned_data
     
     def save(self, commit=True):
+        # The locations were set and validated with the rest of the instance in _post_clean()
         employee = super().save(commit=False)
         
-        # Set location fields based on validated data
-        region_name = self.cleaned_data.get('region')
-        province_name = self.cleaned_data.get('province')
-        city_name = self.cleaned_data.get('city')
-        barangay_name = self.cleaned_data.get('barangay')
-        
-        # Get region object
-        region = Region.objects.filter(regDesc=region_name).first()
-        if region:
-            employee.region = region
-            
-            # Get province object
-            province = Province.objects.filter(
-                provDesc=province_name,
-                regCode=region.regCode
-            ).first()
-            if province:
-                employee.province = province
-                
-                # Get city object
-                city = City.objects.filter(
-                    citymunDesc=city_name,
-                    provCode=province.provCode
-                ).first()
-                if city:
-                    employee.city = city
-                    
-                    # Get barangay object
-                    barangay = Barangay.objects.filter(
-                        brgyDesc=barangay_name,
-                        citymunCode=city.citymunCode
-                    ).first()
-                    if barangay:
-                        employee.barangay = barangay
-        
         if commit:
-            employee.save()
+            # is_valid() already ran the model's full_clean()
+            employee.save(validate=False)
         
         return employee
 
@@ -742,16 +634,11 @@ class CustomerForm(forms.ModelForm):
             raise forms.ValidationError("Barangay is required.")
             
         # Get the predefined city
-        city = City.objects.filter(citymunDesc='ZAMBOANGA CITY').first()
+        index = get_location_index()
+        city = index.city('ZAMBOANGA CITY')
         
-        if city:
-            barangay = Barangay.objects.filter(
-                brgyDesc=barangay_name,
-                citymunCode=city.citymunCode
-            ).first()
-            
-            if not barangay:
-                raise forms.ValidationError("Please select a valid barangay in ZAMBOANGA CITY.")
+        if city and not index.barangay(barangay_name, city.citymunCode):
+            raise forms.ValidationError("Please select a valid barangay in ZAMBOANGA CITY.")
         
         return barangay_name
     
@@ -783,14 +670,13 @@ class CustomerForm(forms.ModelForm):
     def save(self, commit=True):
         customer = super().save(commit=False)
         
-        # Get the pre-defined location objects
-        region = Region.objects.filter(regDesc='REGION IX (ZAMBOANGA PENINSULA)').first()
-        province = Province.objects.filter(provDesc='ZAMBOANGA DEL SUR', regCode=region.regCode).first()
-        city = City.objects.filter(citymunDesc='ZAMBOANGA CITY', provCode=province.provCode).first()
-        
-        # Get the barangay object
-        barangay_name = self.cleaned_data.get('barangay')
-        barangay = Barangay.objects.filter(brgyDesc=barangay_name, citymunCode=city.citymunCode).first()
+        # Get the pre-defined location objects and the barangay object
+        region, province, city, barangay = get_location_index().resolve(
+            'REGION IX (ZAMBOANGA PENINSULA)',
+            'ZAMBOANGA DEL SUR',
+            'ZAMBOANGA CITY',
+            self.cleaned_data.get('barangay')
+        )
         
         # Set the location fields
         customer.region = region
@@ -803,7 +689,7 @@ class CustomerForm(forms.ModelForm):
         
         return customer
 
-class CustomerEditForm(forms.ModelForm):
+class CustomerEditForm(LocationFieldsMixin, forms.ModelForm):
     first_name = forms.CharField(widget=forms.TextInput(attrs={'class': 'h-12'}))
     middle_name = forms.CharField(widget=forms.TextInput(attrs={'class': 'h-12'}), required=False)
     last_name = forms.CharField(widget=forms.TextInput(attrs={'class': 'h-12'}))
@@ -860,77 +746,6 @@ class CustomerEditForm(forms.ModelForm):
     def clean_contact_number(self):
         return self.validate_contact_number(self.cleaned_data.get('contact_number', ''))
     
-    def clean_region(self):
-        region_name = self.cleaned_data.get('region')
-        if not region_name:
-            raise forms.ValidationError("Region is required.")
-            
-        region = Region.objects.filter(regDesc=region_name).first()
-        if not region:
-            raise forms.ValidationError("Please select a valid region.")
-            
-        return region_name
-    
-    def clean_province(self):
-        province_name = self.cleaned_data.get('province')
-        region_name = self.cleaned_data.get('region')
-        
-        if not province_name:
-            raise forms.ValidationError("Province is required.")
-            
-        if region_name:
-            region = Region.objects.filter(regDesc=region_name).first()
-            if region:
-                province = Province.objects.filter(
-                    provDesc=province_name,
-                    regCode=region.regCode
-                ).first()
-                
-                if not province:
-                    raise forms.ValidationError("Province must belong to the selected region.")
-        
-        return province_name
-    
-    def clean_city(self):
-        city_name = self.cleaned_data.get('city')
-        province_name = self.cleaned_data.get('province')
-        
-        if not city_name:
-            raise forms.ValidationError("City is required.")
-            
-        if province_name:
-            province = Province.objects.filter(provDesc=province_name).first()
-            if province:
-                city = City.objects.filter(
-                    citymunDesc=city_name,
-                    provCode=province.provCode
-                ).first()
-                
-                if not city:
-                    raise forms.ValidationError("City must belong to the selected province.")
-        
-        return city_name
-    
-    def clean_barangay(self):
-        barangay_name = self.cleaned_data.get('barangay')
-        city_name = self.cleaned_data.get('city')
-        
-        if not barangay_name:
-            raise forms.ValidationError("Barangay is required.")
-            
-        if city_name:
-            city = City.objects.filter(citymunDesc=city_name).first()
-            if city:
-                barangay = Barangay.objects.filter(
-                    brgyDesc=barangay_name,
-                    citymunCode=city.citymunCode
-                ).first()
-                
-                if not barangay:
-                    raise forms.ValidationError("Barangay must belong to the selected city.")
-        
-        return barangay_name
-    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
@@ -947,43 +762,9 @@ class CustomerEditForm(forms.ModelForm):
                 self.initial['barangay'] = instance.barangay.brgyDesc
     
     def save(self, commit=True):
+        # The locations were set and validated with the rest of the instance in _post_clean()
         customer = super().save(commit=False)
         
-        # Set location fields based on validated data
-        region_name = self.cleaned_data.get('region')
-        province_name = self.cleaned_data.get('province')
-        city_name = self.cleaned_data.get('city')
-        barangay_name = self.cleaned_data.get('barangay')
-        
-        # Get region object
-        region = Region.objects.filter(regDesc=region_name).first()
-        if region:
-            customer.region = region
-            
-            # Get province object
-            province = Province.objects.filter(
-                provDesc=province_name,
-                regCode=region.regCode
-            ).first()
-            if province:
-                customer.province = province
-                
-                # Get city object
-                city = City.objects.filter(
-                    citymunDesc=city_name,
-                    provCode=province.provCode
-                ).first()
-                if city:
-                    customer.city = city
-                    
-                    # Get barangay object
-                    barangay = Barangay.objects.filter(
-                        brgyDesc=barangay_name,
-                        citymunCode=city.citymunCode
-                    ).first()
-                    if barangay:
-                        customer.barangay = barangay
-        
         if commit:
             customer.save()
         
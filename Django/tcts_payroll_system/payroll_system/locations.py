@@ -0,0 +1,276 @@
+"""
+In-memory index over the PSGC reference tables (refregion, refprovince,
+refcitymun, refbrgy).
+
+The tables are static reference data, so each process loads regions,
+provinces and cities once and the barangays of a city the first time that
+city is asked for. Forms and the location endpoints then validate and list
+locations with dictionary lookups instead of queries.
+
+The index also keeps the location endpoints' JSON responses, serialized
+and gzip-compressed once per parent code, with an ETag for revalidation.
+
+The index is versioned through the default cache: run the reload_locations
+command (or call reload_location_index()) after the reference tables change
+and every process sharing that cache rebuilds its index on next use. This
+needs a cache shared between processes (Redis, Memcached, database); with a
+per-process backend such as the default LocMemCache only the reloading
+process sees the bump, and server processes must be restarted instead.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import defaultdict, namedtuple
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from .models import Region, Province, City, Barangay
+
+LOCATION_INDEX_VERSION_KEY = 'payroll_system:location_index_version'
+
+# A serialized endpoint response: raw JSON bytes, their gzip encoding and an ETag of the JSON
+LocationPayload = namedtuple('LocationPayload', ['body', 'gzipped', 'etag'])
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class LocationIndex:
+    """
+    Lookups by code (children of a parent) and by description (optionally
+    within a parent). Where several rows share a description the one with
+    the lowest id wins, matching the forms' previous .first() queries.
+    Children are listed in alphabetical order.
+    """
+
+    def __init__(self, version):
+        self.version = version
+
+        regions = list(Region.objects.order_by('pk'))
+        self.regions = sorted(regions, key=lambda region: region.regDesc)
+        self.region_by_name = {}
+        for region in regions:
+            self.region_by_name.setdefault(region.regDesc, region)
+
+        self._provinces = defaultdict(list)
+        self.province_by_name = {}
+        self.province_by_parent = {}
+        for province in Province.objects.order_by('pk'):
+            self._provinces[province.regCode].append(province)
+            self.province_by_name.setdefault(province.provDesc, province)
+            self.province_by_parent.setdefault((province.provDesc, province.regCode), province)
+
+        self._cities = defaultdict(list)
+        self.city_by_name = {}
+        self.city_by_parent = {}
+        for city in City.objects.order_by('pk'):
+            self._cities[city.provCode].append(city)
+            self.city_by_name.setdefault(city.citymunDesc, city)
+            self.city_by_parent.setdefault((city.citymunDesc, city.provCode), city)
+
+        for provinces in self._provinces.values():
+            provinces.sort(key=lambda province: province.provDesc)
+        for cities in self._cities.values():
+            cities.sort(key=lambda city: city.citymunDesc)
+
+        # Valid parent codes per payload kind; codes come from the client, so nothing
+        # is loaded or cached for codes that do not exist
+        self._city_codes = {city.citymunCode for cities in self._cities.values() for city in cities}
+        self._parent_codes = {
+            'provinces': {region.regCode for region in regions},
+            'cities': {province.provCode for provinces in self._provinces.values() for province in provinces},
+            'barangays': self._city_codes,
+            'region': {region.regCode for region in regions},
+        }
+
+        # Barangays are by far the largest table, so they are loaded one city at a time
+        self._barangays = {}
+        self._barangay_by_name = {}
+        self._barangay_lock = threading.Lock()
+
+        self._payloads = {}
+
+    def region(self, name):
+        return self.region_by_name.get(name)
+
+    def province(self, name, region_code=None):
+        if region_code is None:
+            return self.province_by_name.get(name)
+        return self.province_by_parent.get((name, region_code))
+
+    def city(self, name, province_code=None):
+        if province_code is None:
+            return self.city_by_name.get(name)
+        return self.city_by_parent.get((name, province_code))
+
+    def barangay(self, name, city_code):
+        self._load_barangays(city_code)
+        return self._barangay_by_name.get(city_code, {}).get(name)
+
+    def provinces(self, region_code):
+        return self._provinces.get(region_code, [])
+
+    def cities(self, province_code):
+        return self._cities.get(province_code, [])
+
+    def barangays(self, city_code):
+        return self._load_barangays(city_code)
+
+    def _load_barangays(self, city_code):
+        if city_code not in self._city_codes:
+            return []
+
+        barangays = self._barangays.get(city_code)
+        if barangays is None:
+            with self._barangay_lock:
+                barangays = self._barangays.get(city_code)
+                if barangays is None:
+                    self._store_barangays(
+                        [city_code],
+                        Barangay.objects.filter(citymunCode=city_code).order_by('pk')
+                    )
+                    barangays = self._barangays[city_code]
+        return barangays
+
+    def _load_region_barangays(self, region_code):
+        """Load the barangays of every city in a region that is not loaded yet, in one query."""
+        city_codes = [
+            city.citymunCode
+            for province in self.provinces(region_code)
+            for city in self.cities(province.provCode)
+            if city.citymunCode not in self._barangays
+        ]
+        if city_codes:
+            with self._barangay_lock:
+                city_codes = [code for code in city_codes if code not in self._barangays]
+                self._store_barangays(
+                    city_codes,
+                    Barangay.objects.filter(citymunCode__in=city_codes).order_by('pk')
+                )
+
+    def _store_barangays(self, city_codes, queryset):
+        # Called with _barangay_lock held
+        loaded = defaultdict(list)
+        for barangay in queryset:
+            loaded[barangay.citymunCode].append(barangay)
+
+        for city_code in city_codes:
+            by_name = {}
+            for barangay in loaded[city_code]:
+                by_name.setdefault(barangay.brgyDesc, barangay)
+            self._barangay_by_name[city_code] = by_name
+            self._barangays[city_code] = sorted(loaded[city_code], key=lambda barangay: barangay.brgyDesc)
+
+    def payload(self, kind, code):
+        """
+        The serialized response for `kind` ('provinces', 'cities', 'barangays' or
+        'region') under the parent `code`, built on first request and reused after.
+        """
+        key = (kind, code)
+        payload = self._payloads.get(key)
+        if payload is None:
+            body = json.dumps(self._payload_data(kind, code), separators=(',', ':')).encode()
+            payload = LocationPayload(
+                body=body,
+                # mtime=0 keeps the compressed bytes identical across processes
+                gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+                etag=hashlib.sha1(body).hexdigest(),
+            )
+            if code in self._parent_codes[kind]:
+                self._payloads[key] = payload
+        return payload
+
+    def _payload_data(self, kind, code):
+        if kind == 'provinces':
+            return {'provinces': [
+                {'provDesc': province.provDesc, 'provCode': province.provCode}
+                for province in self.provinces(code)
+            ]}
+        if kind == 'cities':
+            return {'cities': [
+                {'citymunDesc': city.citymunDesc, 'citymunCode': city.citymunCode}
+                for city in self.cities(code)
+            ]}
+        if kind == 'barangays':
+            return {'barangays': [
+                {'brgyDesc': barangay.brgyDesc, 'brgyCode': barangay.brgyCode}
+                for barangay in self.barangays(code)
+            ]}
+        if kind == 'region':
+            return self._region_tree(code)
+        raise ValueError(f"Unknown location payload: {kind}")
+
+    def _region_tree(self, region_code):
+        """A region's whole hierarchy down to barangays, for clients that work offline."""
+        region = next((region for region in self.regions if region.regCode == region_code), None)
+        if region is None:
+            return {'region': None, 'provinces': []}
+
+        self._load_region_barangays(region_code)
+        return {
+            'region': {'regDesc': region.regDesc, 'regCode': region.regCode},
+            'provinces': [
+                {
+                    'provDesc': province.provDesc,
+                    'provCode': province.provCode,
+                    'cities': [
+                        {
+                            'citymunDesc': city.citymunDesc,
+                            'citymunCode': city.citymunCode,
+                            'barangays': [
+                                {'brgyDesc': barangay.brgyDesc, 'brgyCode': barangay.brgyCode}
+                                for barangay in self.barangays(city.citymunCode)
+                            ],
+                        }
+                        for city in self.cities(province.provCode)
+                    ],
+                }
+                for province in self.provinces(region_code)
+            ],
+        }
+
+    def resolve(self, region_name, province_name, city_name, barangay_name):
+        """
+        Resolve names to (region, province, city, barangay), each level within the
+        one above it. Levels below the first name that does not resolve are None.
+        """
+        region = self.region(region_name)
+        province = self.province(province_name, region.regCode) if region else None
+        city = self.city(city_name, province.provCode) if province else None
+        barangay = self.barangay(barangay_name, city.citymunCode) if city else None
+        return region, province, city, barangay
+
+
+def get_location_index():
+    """Return this process's location index, building it on first use or after a reload."""
+    global _index
+    version = cache.get(LOCATION_INDEX_VERSION_KEY, 0)
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = LocationIndex(version)
+            index = _index
+    return index
+
+
+def location_cache_is_shared():
+    """Whether the default cache is shared between processes, so a version bump reaches all of them."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def reload_location_index():
+    """
+    Bump the index version so every process sharing the cache rebuilds its index on
+    next use, and drop this process's index. Returns location_cache_is_shared().
+    """
+    global _index
+    try:
+        cache.incr(LOCATION_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(LOCATION_INDEX_VERSION_KEY, 1, None)
+
+    with _index_lock:
+        _index = None
+    return location_cache_is_shared()
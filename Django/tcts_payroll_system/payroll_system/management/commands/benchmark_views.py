@@ -0,0 +1,295 @@
+import json
+import textwrap
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from payroll_system.dashboard import DASHBOARD_CACHE_KEY
+from payroll_system.models import Attendance, Employee, PayrollPeriod, PayrollRecord
+
+
+class RollbackBenchmark(Exception):
+    """Raised at the end of a run so every write made by the benchmark is rolled back."""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the hot payroll and attendance views through the test client and report "
+        "latency percentiles and query counts. With --indexes, time the hot queries with and "
+        "without their indexes instead. Every write is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help="Requests per view (default: 20)")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per view before measuring (default: 2)")
+        parser.add_argument('--views', nargs='*', default=None, help="Only run these views (default: all)")
+        parser.add_argument('--save', default=None, help="Write the results as JSON to this path, for use as a baseline")
+        parser.add_argument('--baseline', default=None, help="Compare against results saved earlier with --save")
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help="Fail if any view's p95 grows by more than this percentage over the baseline")
+        parser.add_argument('--indexes', action='store_true',
+                            help="Time the hot attendance and payroll queries with and without their indexes (migration 0009) instead of the views")
+        parser.add_argument('--explain', action='store_true', help="With --indexes, also print each query plan with and without the index")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1")
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+        if options['indexes'] and (options['views'] or options['save'] or baseline):
+            raise CommandError("--indexes cannot be combined with --views, --save or --baseline")
+        if options['explain'] and not options['indexes']:
+            raise CommandError("--explain needs --indexes")
+
+        self.period = PayrollPeriod.objects.filter(
+            payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS
+        ).first()
+        self.employee = Employee.objects.filter(is_active=True).order_by('employee_id').first()
+        if not self.period or not self.employee:
+            raise CommandError("Needs an in-progress payroll period and an active employee; run seed_payroll_data first.")
+
+        if options['indexes']:
+            try:
+                with transaction.atomic():
+                    self.compare_indexes(options['iterations'], options['warmup'], options['explain'])
+                    raise RollbackBenchmark
+            except RollbackBenchmark:
+                pass
+            return
+
+        scenarios = self.get_scenarios()
+        if options['views']:
+            unknown = set(options['views']) - {scenario['name'] for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown views: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario['name'] in options['views']]
+
+        results = {}
+        try:
+            with transaction.atomic():
+                self.client = self.make_client()
+                for scenario in scenarios:
+                    results[scenario['name']] = self.run_scenario(scenario, options['iterations'], options['warmup'])
+                raise RollbackBenchmark
+        except RollbackBenchmark:
+            pass
+        finally:
+            cache.delete(DASHBOARD_CACHE_KEY)
+
+        self.report(results, baseline)
+
+        if options['save']:
+            with open(options['save'], 'w') as results_file:
+                json.dump(results, results_file, indent=2)
+            self.stdout.write(f"Saved results to {options['save']}")
+
+        if baseline and options['max_regression'] is not None:
+            self.check_regressions(results, baseline, options['max_regression'])
+
+    def make_client(self):
+        """A test client logged in as a throwaway superuser, talking to an allowed host."""
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')), 'localhost')
+        client = Client(HTTP_HOST=host, SERVER_NAME=host)
+        user = get_user_model().objects.create_superuser(
+            username=f"benchmark-{int(time.time())}",
+            email='',
+            password=None
+        )
+        client.force_login(user)
+        return client
+
+    def get_scenarios(self):
+        """
+        Each scenario has a request and an optional untimed setup that puts the
+        database in the state the request expects (e.g. an open session to time out).
+        """
+        period_id = self.period.payroll_period_id
+
+        def clear_dashboard_cache():
+            cache.delete(DASHBOARD_CACHE_KEY)
+
+        def make_period_confirmable():
+            # confirm() refuses periods that have not ended yet
+            PayrollPeriod.objects.filter(pk=period_id).update(end_date=timezone.localdate())
+
+        def open_session():
+            Attendance.objects.filter(employee=self.employee, date=timezone.localdate()).delete()
+            Attendance.clock_in(self.employee, timezone.localdate(), timezone.localtime().time().replace(hour=8))
+
+        def close_sessions():
+            Attendance.objects.filter(employee=self.employee, date=timezone.localdate()).delete()
+
+        return [
+            {'name': 'dashboard', 'method': 'get', 'url': reverse('payroll_system:dashboard'), 'setup': clear_dashboard_cache},
+            {'name': 'dashboard_cached', 'method': 'get', 'url': reverse('payroll_system:dashboard')},
+            {'name': 'payroll_record', 'method': 'get', 'url': reverse('payroll_system:payroll_record'), 'data': {'payroll_id': period_id}},
+            {'name': 'payroll_history', 'method': 'get', 'url': reverse('payroll_system:payroll_history')},
+            {'name': 'generate_payroll', 'method': 'get', 'url': reverse('payroll_system:generate_payroll', args=[period_id])},
+            {'name': 'confirm_payroll', 'method': 'post', 'url': reverse('payroll_system:confirm_payroll', args=[period_id]), 'setup': make_period_confirmable},
+            {'name': 'attendance_time_in', 'method': 'post', 'url': reverse('attendance:attendance'),
+             'data': {'action': 'time_in', 'employee_id': self.employee.employee_id}, 'setup': close_sessions},
+            {'name': 'attendance_time_out', 'method': 'post', 'url': reverse('attendance:attendance'),
+             'data': {'action': 'time_out', 'employee_id': self.employee.employee_id}, 'setup': open_session},
+        ]
+
+    def get_index_queries(self):
+        """The hot queries behind attendance writes and payroll pages, each with the index it should use."""
+        today = timezone.localdate()
+        week = (today - timedelta(days=6), today)
+        return [
+            {'name': 'employee_attendance_week', 'model': Attendance, 'index': 'attendance_employee_date',
+             'queryset': Attendance.objects.filter(employee=self.employee, date__range=week)},
+            {'name': 'present_this_week', 'model': Attendance, 'index': 'attendance_date_status',
+             'queryset': Attendance.objects.filter(date__range=week, attendance_status=Attendance.AttendanceStatus.PRESENT)},
+            {'name': 'inprogress_period_for_date', 'model': PayrollPeriod, 'index': 'payroll_period_status_end',
+             'queryset': PayrollPeriod.objects.filter(
+                 payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS, start_date__lte=today, end_date__gte=today
+             )},
+            {'name': 'period_records', 'model': PayrollRecord, 'index': 'payroll_record_period_emp',
+             'queryset': PayrollRecord.objects.filter(payroll_period=self.period).order_by('employee_id')},
+            {'name': 'dirty_records', 'model': PayrollRecord, 'index': 'payroll_record_dirty',
+             'queryset': PayrollRecord.objects.filter(needs_recalculation=True, payroll_period=self.period)},
+        ]
+
+    def compare_indexes(self, iterations, warmup, explain):
+        """
+        Time each hot query, then drop its index inside a savepoint and time it again.
+        Dropping an index is transactional on SQLite and PostgreSQL, so the rollback restores it.
+        """
+        results = {}
+        for query in self.get_index_queries():
+            with_index = self.time_query(query['queryset'], iterations, warmup)
+            plan_with = self.query_plan(query['queryset'], 'with index')
+
+            sid = transaction.savepoint()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(query['index'])}")
+            without_index = self.time_query(query['queryset'], iterations, warmup)
+            plan_without = self.query_plan(query['queryset'], 'without index')
+            transaction.savepoint_rollback(sid)
+
+            results[query['name']] = (query['index'], with_index, without_index, plan_with, plan_without)
+
+        header = f"{'query':<28}{'index':<28}{'with ms':>10}{'without ms':>12}{'speedup':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, (index_name, with_index, without_index, plan_with, plan_without) in results.items():
+            speedup = f"{without_index / with_index:.1f}x" if with_index else 'n/a'
+            self.stdout.write(f"{name:<28}{index_name:<28}{with_index:>10.3f}{without_index:>12.3f}{speedup:>9}")
+            if explain:
+                self.stdout.write(f"  with index:\n{textwrap.indent(plan_with, '    ')}")
+                self.stdout.write(f"  without index:\n{textwrap.indent(plan_without, '    ')}")
+
+    def query_plan(self, queryset, label):
+        """
+        The database's plan for `queryset`. SQLite caches prepared EXPLAIN statements by
+        their text and does not plan them again after an index is dropped, so `label` is
+        added as a comment to give each plan its own statement.
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql} /* {label} */", params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def time_query(self, queryset, iterations, warmup):
+        """Median time in milliseconds to fetch every row of `queryset`."""
+        timings = []
+        for i in range(warmup + iterations):
+            started = time.perf_counter()
+            list(queryset.all())
+            elapsed = (time.perf_counter() - started) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+        return percentile(timings, 50)
+
+    def run_scenario(self, scenario, iterations, warmup):
+        send = getattr(self.client, scenario['method'])
+        timings = []
+        query_counts = []
+        statuses = set()
+
+        for i in range(warmup + iterations):
+            # Each request runs in its own savepoint so writes do not pile up between iterations
+            sid = transaction.savepoint()
+            if scenario.get('setup'):
+                scenario['setup']()
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = send(scenario['url'], scenario.get('data', {}))
+                elapsed = (time.perf_counter() - started) * 1000
+
+            transaction.savepoint_rollback(sid)
+
+            if i < warmup:
+                continue
+            timings.append(elapsed)
+            query_counts.append(len(queries))
+            statuses.add(response.status_code)
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(query_counts),
+            'statuses': sorted(statuses),
+        }
+
+    def report(self, results, baseline):
+        header = f"{'view':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}  status"
+        if baseline:
+            header += f"{'p95 vs base':>14}{'queries vs base':>17}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for name, result in results.items():
+            line = (
+                f"{name:<22}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries']:>9}  {','.join(str(status) for status in result['statuses']):<6}"
+            )
+            if baseline and name in baseline:
+                base = baseline[name]
+                line += f"{self.format_change(result['p95_ms'], base['p95_ms']):>14}"
+                line += f"{result['queries'] - base['queries']:>+17}"
+            self.stdout.write(line)
+
+    def format_change(self, value, base):
+        if not base:
+            return 'n/a'
+        return f"{(value - base) / base * 100:+.1f}%"
+
+    def check_regressions(self, results, baseline, max_regression):
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if not base:
+                continue
+            if base['p95_ms'] and (result['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 > max_regression:
+                regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+            if result['queries'] > base['queries']:
+                regressions.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No view regressed by more than {max_regression}% against the baseline."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from payroll_system.employee_import import ImportFileError, import_employees, write_report
+
+
+class Command(BaseCommand):
+    help = "Import employees from a CSV file and a zip of their photos, enrolling their faces"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="CSV file with one employee per row (see payroll_system/employee_import.py for the columns)")
+        parser.add_argument('--photos', required=True, help="Zip file with the photos named in the CSV's photo column")
+        parser.add_argument('--report', default=None, help="Write the per-row report to this CSV path instead of stdout")
+        parser.add_argument('--no-enroll', action='store_true', help="Skip face enrollment")
+        parser.add_argument('--workers', type=int, default=None, help="Face enrollment worker processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        try:
+            report = import_employees(
+                options['csv_path'],
+                photos_zip=options['photos'],
+                enroll_faces=not options['no_enroll'],
+                workers=options['workers']
+            )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report_file:
+                write_report(report, report_file)
+        else:
+            write_report(report, self.stdout)
+
+        created = sum(1 for entry in report if entry['status'] == 'created')
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} of {len(report)} employees."))
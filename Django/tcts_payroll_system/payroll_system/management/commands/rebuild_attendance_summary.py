@@ -0,0 +1,41 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from payroll_system.models import DailyAttendanceSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily attendance summary from attendance records"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help="Only rebuild days on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            '--end',
+            help="Only rebuild days on or before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Summary rows inserted per query (default: 1000)",
+        )
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start_date = self.parse_date(options['start'])
+        end_date = self.parse_date(options['end'])
+
+        if start_date and end_date and start_date > end_date:
+            raise CommandError("--start must not be after --end")
+
+        count = DailyAttendanceSummary.rebuild(start_date, end_date, batch_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt {count} daily attendance summary row(s).")
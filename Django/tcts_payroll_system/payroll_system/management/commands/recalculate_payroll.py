@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from payroll_system.models import PayrollRecord
+
+
+class Command(BaseCommand):
+    # Attendance writes normally have their records recalculated by the background worker
+    # (see PayrollRecalculationWorker); this catches records left flagged by a failed run or a restart
+    help = "Recalculate payroll records flagged by attendance changes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help="Keep running and check for flagged records every N seconds (0 runs once)",
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            count = PayrollRecord.recalculate_dirty()
+            if count or not interval:
+                self.stdout.write(f"Recalculated {count} payroll record(s).")
+
+            if not interval:
+                break
+            time.sleep(interval)
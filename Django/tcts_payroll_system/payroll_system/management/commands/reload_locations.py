@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from payroll_system.locations import reload_location_index
+
+
+class Command(BaseCommand):
+    help = "Make every process rebuild its location index after the PSGC reference tables change"
+
+    def handle(self, *args, **options):
+        if reload_location_index():
+            self.stdout.write(self.style.SUCCESS("Location index version bumped; processes rebuild it on next use."))
+        else:
+            # The bump went to a cache only this command's process can see
+            self.stderr.write(self.style.WARNING(
+                "The default cache is private to each process, so running server processes keep "
+                "their current location index. Restart them, or configure a shared cache backend "
+                "(e.g. Redis or Memcached) in CACHES so reload_locations reaches them."
+            ))
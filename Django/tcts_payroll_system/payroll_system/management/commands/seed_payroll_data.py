@@ -0,0 +1,236 @@
+import random
+import time
+from datetime import datetime, timedelta, time as time_of_day
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from payroll_system.models import (
+    Attendance, Customer, DailyAttendanceSummary, Deduction, Employee, Gender, History,
+    PayrollPeriod, PayrollRecord, Service, Task, Vehicle
+)
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paolo', 'Liza', 'Carlo', 'Joy', 'Rico', 'Bea']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Aquino']
+SERVICE_TITLES = ['Window Tint', 'Ceramic Coating', 'Paint Protection Film', 'Interior Detailing']
+VEHICLE_NAMES = ['Toyota Vios', 'Honda City', 'Mitsubishi Mirage', 'Ford Ranger', 'Nissan Navara']
+VEHICLE_COLORS = ['White', 'Black', 'Silver', 'Red', 'Blue', 'Gray']
+
+# Seeded rows point at this placeholder instead of uploading one file per row
+PLACEHOLDER_IMAGE = 'images/seed_placeholder.jpg'
+
+# Length in days of each period type, cycled through when laying out periods
+PERIOD_LENGTHS = [
+    (PayrollPeriod.Type.WEEKLY, 7),
+    (PayrollPeriod.Type.BIWEEKLY, 14),
+    (PayrollPeriod.Type.MONTHLY, 30),
+]
+
+
+class Command(BaseCommand):
+    help = "Seed the database with synthetic employees, attendance, payroll, customers and tasks for local load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50, help="Number of employees (default: 50)")
+        parser.add_argument('--days', type=int, default=90, help="Days of attendance history up to today (default: 90)")
+        parser.add_argument('--customers', type=int, default=None, help="Number of customers, each with one vehicle (default: 2 per employee)")
+        parser.add_argument('--tasks', type=int, default=None, help="Number of tasks (default: one per customer)")
+        parser.add_argument('--absence-rate', type=float, default=0.08, help="Share of working days marked absent (default: 0.08)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, so runs are reproducible (default: 0)")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows inserted per query (default: 5000)")
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['days'] < 1:
+            raise CommandError("--employees and --days must be at least 1")
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = timezone.localdate()
+        self.start_date = self.today - timedelta(days=options['days'] - 1)
+
+        customer_count = options['customers'] if options['customers'] is not None else options['employees'] * 2
+        task_count = options['tasks'] if options['tasks'] is not None else customer_count
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            employees = self.seed_employees(options['employees'])
+            attendance_count = self.seed_attendance(employees, options['absence_rate'])
+            periods = self.seed_payroll(employees)
+            customers, vehicles = self.seed_customers(customer_count)
+            self.seed_tasks(task_count, employees, customers, vehicles)
+            History.objects.bulk_create(
+                [History(description=f"Seeded {len(employees)} employees and {len(periods)} payroll periods")]
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(employees)} employees, {attendance_count} attendance records, "
+            f"{len(periods)} payroll periods, {len(customers)} customers and {task_count} tasks "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def seed_employees(self, count):
+        offset = Employee.objects.count()
+        employees = []
+        for i in range(count):
+            number = offset + i + 1
+            employees.append(Employee(
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=f"{self.random.choice(LAST_NAMES)} {number}",
+                gender=self.random.choice(Gender.values),
+                date_of_birth=self.today - timedelta(days=365 * self.random.randint(20, 55)),
+                contact_number=f"09{number:09d}",
+                emergency_contact=f"08{number:09d}",
+                highest_education=self.random.choice(Employee.HighestEducation.values),
+                daily_rate=self.random.choice([450, 500, 550, 600, 650, 700]),
+                date_of_employment=self.start_date - timedelta(days=self.random.randint(0, 365)),
+                employee_status=self.random.choice(Employee.EmployeeStatus.values),
+                is_active=True,
+                employee_image=PLACEHOLDER_IMAGE,
+            ))
+        return Employee.objects.bulk_create(employees, batch_size=self.batch_size)
+
+    def seed_attendance(self, employees, absence_rate):
+        """Punches for every working day (Monday to Saturday); today's sessions are left open."""
+        batch = []
+        count = 0
+        day = self.start_date
+        while day <= self.today:
+            if day.weekday() != 6:
+                for employee in employees:
+                    batch.append(self.make_attendance(employee, day, absence_rate))
+                    if len(batch) >= self.batch_size:
+                        Attendance.objects.bulk_create(batch)
+                        count += len(batch)
+                        batch = []
+            day += timedelta(days=1)
+
+        Attendance.objects.bulk_create(batch)
+        count += len(batch)
+
+        # bulk_create skips Attendance.save(), so build the daily summary in one pass
+        DailyAttendanceSummary.rebuild(self.start_date, self.today, batch_size=self.batch_size)
+        return count
+
+    def make_attendance(self, employee, day, absence_rate):
+        if self.random.random() < absence_rate:
+            return Attendance(employee=employee, date=day, attendance_status=Attendance.AttendanceStatus.ABSENT)
+
+        time_in = time_of_day(8, self.random.randint(0, 59))
+        time_out = None
+        hours_worked = 0
+        if day < self.today:
+            time_out = time_of_day(16, self.random.randint(0, 59))
+            worked = datetime.combine(day, time_out) - datetime.combine(day, time_in)
+            hours_worked = round(worked.total_seconds() / 3600, 2)
+
+        return Attendance(
+            employee=employee,
+            date=day,
+            time_in=time_in,
+            time_out=time_out,
+            hours_worked=hours_worked,
+            attendance_status=Attendance.AttendanceStatus.PRESENT,
+        )
+
+    def seed_payroll(self, employees):
+        """
+        Back-to-back periods cycling through every period type: past ones processed,
+        the one covering today in progress, plus one pending period after it.
+        """
+        periods = []
+        start = self.start_date
+        index = 0
+        while True:
+            period_type, length = PERIOD_LENGTHS[index % len(PERIOD_LENGTHS)]
+            end = start + timedelta(days=length - 1)
+
+            if end < self.today:
+                status = PayrollPeriod.PayrollStatus.PROCESSED
+            elif start <= self.today:
+                status = PayrollPeriod.PayrollStatus.INPROGRESS
+            else:
+                status = PayrollPeriod.PayrollStatus.PENDING
+
+            periods.append(PayrollPeriod(
+                start_date=start,
+                end_date=end,
+                payment_date=end,
+                payroll_status=status,
+                type=period_type,
+            ))
+
+            if status == PayrollPeriod.PayrollStatus.PENDING:
+                break
+            start = end + timedelta(days=1)
+            index += 1
+
+        periods = PayrollPeriod.objects.bulk_create(periods)
+
+        PayrollRecord.objects.bulk_create(
+            [PayrollRecord(employee=employee, payroll_period=period) for period in periods for employee in employees],
+            batch_size=self.batch_size
+        )
+
+        for period in periods:
+            if period.payroll_status == PayrollPeriod.PayrollStatus.PENDING:
+                continue
+
+            PayrollRecord.recalculate_records(list(period.payroll_records.select_related('employee', 'payroll_period')))
+            period.apply_deduction(Deduction.DeductionType.SSS, 150)
+            period.apply_deduction(Deduction.DeductionType.PHILHEALTH, 100)
+            period.apply_deduction(Deduction.DeductionType.PAGIBIG, 50)
+
+            if period.payroll_status == PayrollPeriod.PayrollStatus.PROCESSED:
+                period.freeze_totals()
+
+        PayrollPeriod.objects.bulk_update(periods, ['total_net_pay', 'total_gross', 'total_deductions', 'headcount'])
+        return periods
+
+    def seed_customers(self, count):
+        offset = Customer.objects.count()
+        customers = Customer.objects.bulk_create(
+            [
+                Customer(
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=f"{self.random.choice(LAST_NAMES)} {offset + i + 1}",
+                    contact_number=f"07{offset + i + 1:09d}",
+                )
+                for i in range(count)
+            ],
+            batch_size=self.batch_size
+        )
+
+        vehicles = Vehicle.objects.bulk_create(
+            [
+                Vehicle(
+                    customer=customer,
+                    vehicle_name=self.random.choice(VEHICLE_NAMES),
+                    vehicle_color=self.random.choice(VEHICLE_COLORS),
+                    plate_number=f"SEED-{customer.customer_id:06d}",
+                )
+                for customer in customers
+            ],
+            batch_size=self.batch_size
+        )
+        return customers, vehicles
+
+    def seed_tasks(self, count, employees, customers, vehicles):
+        if not count or not customers:
+            return
+
+        services = list(Service.objects.all()) or Service.objects.bulk_create(
+            [Service(title=title, service_image=PLACEHOLDER_IMAGE) for title in SERVICE_TITLES]
+        )
+
+        tasks = []
+        for i in range(count):
+            index = self.random.randrange(len(customers))
+            service = self.random.choice(services)
+            tasks.append(Task(
+                task_name=f"{service.title} #{i + 1}",
+                task_status=self.random.choice(Task.TaskStatus.values),
+                service=service,
+                customer=customers[index],
+                vehicle=vehicles[index],
+                employee=self.random.choice(employees),
+            ))
+        Task.objects.bulk_create(tasks, batch_size=self.batch_size)
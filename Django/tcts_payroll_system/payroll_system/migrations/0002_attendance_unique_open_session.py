@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:12
+
+from django.db import migrations, models
+
+
+def remove_duplicate_open_sessions(apps, schema_editor):
+    # Double submits could leave several open sessions for one employee and day;
+    # keep the earliest time in and drop the rest so the constraint can be added
+    Attendance = apps.get_model('payroll_system', 'Attendance')
+    seen = set()
+    open_sessions = Attendance.objects.filter(
+        time_in__isnull=False,
+        time_out__isnull=True
+    ).order_by('employee_id', 'date', 'time_in', 'attendance_id')
+
+    for attendance in open_sessions:
+        key = (attendance.employee_id, attendance.date)
+        if key in seen:
+            attendance.delete()
+        else:
+            seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('time_in__isnull', False), ('time_out__isnull', True)), fields=('employee', 'date'), name='unique_open_attendance_session'),
+        ),
+    ]
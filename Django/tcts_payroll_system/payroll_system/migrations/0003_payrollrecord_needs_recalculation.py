@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0002_attendance_unique_open_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrecord',
+            name='needs_recalculation',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:05
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def merge_duplicate_payroll_records(apps, schema_editor):
+    # Racing check-then-create writers could leave several records for one
+    # employee and period; keep the oldest, fold the others' incentives, cash
+    # advances and deductions into it and drop the rest so the constraint can be added
+    PayrollRecord = apps.get_model('payroll_system', 'PayrollRecord')
+    Deduction = apps.get_model('payroll_system', 'Deduction')
+    kept = {}
+    merged = {}
+    records = PayrollRecord.objects.order_by('employee_id', 'payroll_period_id', 'payroll_record_id')
+
+    for record in records:
+        key = (record.employee_id, record.payroll_period_id)
+        if key not in kept:
+            kept[key] = record
+            continue
+
+        survivor = kept[key]
+        survivor.incentives += record.incentives
+        survivor.cash_advance += record.cash_advance
+        # Gross pay includes incentives; the days worked are the same on every duplicate
+        survivor.gross_pay += record.incentives
+        merged[key] = survivor
+
+        Deduction.objects.filter(payroll_record=record).update(payroll_record=survivor)
+        record.delete()
+
+    for survivor in merged.values():
+        deductions = Deduction.objects.filter(payroll_record=survivor).aggregate(total=Sum('amount'))['total'] or 0
+        survivor.net_pay = max(0, survivor.gross_pay - deductions)
+        survivor.save(update_fields=['incentives', 'cash_advance', 'gross_pay', 'net_pay'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0003_payrollrecord_needs_recalculation'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_payroll_records, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payrollrecord',
+            constraint=models.UniqueConstraint(fields=('employee', 'payroll_period'), name='unique_employee_payroll_period'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:16
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_deductions(apps, schema_editor):
+    PayrollRecord = apps.get_model('payroll_system', 'PayrollRecord')
+    Deduction = apps.get_model('payroll_system', 'Deduction')
+    deduction_totals = (
+        Deduction.objects
+        .filter(payroll_record=OuterRef('pk'))
+        .values('payroll_record')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    PayrollRecord.objects.update(
+        total_deductions=Coalesce(Subquery(deduction_totals), 0.0, output_field=models.FloatField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0004_payrollrecord_unique_employee_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrecord',
+            name='total_deductions',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_total_deductions, migrations.RunPython.noop),
+    ]
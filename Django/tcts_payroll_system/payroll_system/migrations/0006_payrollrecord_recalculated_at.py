@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0005_payrollrecord_total_deductions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrecord',
+            name='recalculated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:19
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def freeze_processed_totals(apps, schema_editor):
+    # Processed periods no longer change, so their totals are computed once here
+    PayrollPeriod = apps.get_model('payroll_system', 'PayrollPeriod')
+    PayrollRecord = apps.get_model('payroll_system', 'PayrollRecord')
+    totals = (
+        PayrollRecord.objects
+        .filter(payroll_period__payroll_status='PROCESSED')
+        .values('payroll_period_id')
+        .annotate(
+            total_net_pay=Sum('net_pay'),
+            total_gross=Sum('gross_pay'),
+            total_deductions=Sum('total_deductions'),
+            headcount=Count('pk'),
+        )
+    )
+
+    for row in totals:
+        PayrollPeriod.objects.filter(pk=row.pop('payroll_period_id')).update(
+            **{field: value or 0 for field, value in row.items()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0006_payrollrecord_recalculated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='headcount',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='total_deductions',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='total_gross',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='total_net_pay',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(freeze_processed_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+
+
+def populate_daily_summary(apps, schema_editor):
+    Attendance = apps.get_model('payroll_system', 'Attendance')
+    DailyAttendanceSummary = apps.get_model('payroll_system', 'DailyAttendanceSummary')
+    rows = Attendance.objects.order_by().values('employee_id', 'date').annotate(
+        present_count=Count('pk', filter=Q(attendance_status='Present')),
+        absent_count=Count('pk', filter=Q(attendance_status='Absent')),
+        first_in=Min('time_in'),
+        last_out=Max('time_out'),
+        total_hours=Sum('hours_worked'),
+    )
+
+    DailyAttendanceSummary.objects.bulk_create(
+        (
+            DailyAttendanceSummary(
+                employee_id=row['employee_id'],
+                date=row['date'],
+                present=row['present_count'] > 0,
+                absent=row['absent_count'] > 0,
+                first_in=row['first_in'],
+                last_out=row['last_out'],
+                total_hours=row['total_hours'] or 0,
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0007_payrollperiod_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('summary_id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('present', models.BooleanField(default=False)),
+                ('absent', models.BooleanField(default=False)),
+                ('first_in', models.TimeField(blank=True, null=True)),
+                ('last_out', models.TimeField(blank=True, null=True)),
+                ('total_hours', models.FloatField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance', to='payroll_system.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'present'], name='daily_attendance_date_present')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='unique_daily_attendance_summary')],
+            },
+        ),
+        migrations.RunPython(populate_daily_summary, migrations.RunPython.noop),
+    ]
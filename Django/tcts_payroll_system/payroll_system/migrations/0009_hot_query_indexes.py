@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0008_dailyattendancesummary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payrollrecord',
+            name='needs_recalculation',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'date'], name='attendance_employee_date'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'attendance_status'], name='attendance_date_status'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollperiod',
+            index=models.Index(fields=['payroll_status', 'end_date'], name='payroll_period_status_end'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollrecord',
+            index=models.Index(fields=['payroll_period', 'employee'], name='payroll_record_period_emp'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollrecord',
+            index=models.Index(condition=models.Q(('needs_recalculation', True)), fields=['payroll_period'], name='payroll_record_dirty'),
+        ),
+    ]
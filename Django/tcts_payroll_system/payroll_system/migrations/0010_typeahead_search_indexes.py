@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:34
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+# The NOCASE collation indexes are for SQLite, whose case-insensitive LIKE (what
+# istartswith compiles to) can only use an index with that collation. Other backends
+# do not have a NOCASE collation, and istartswith there (UPPER(...) LIKE on
+# PostgreSQL) would need expression indexes instead.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll_system', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.comparison.Collate('last_name', 'nocase'), name='customer_last_name_search'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.comparison.Collate('first_name', 'nocase'), name='customer_first_name_search'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.comparison.Collate('contact_number', 'nocase'), name='customer_contact_search'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.comparison.Collate('last_name', 'nocase'), name='employee_last_name_search'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.comparison.Collate('first_name', 'nocase'), name='employee_first_name_search'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.comparison.Collate('contact_number', 'nocase'), name='employee_contact_search'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.functions.comparison.Collate('plate_number', 'nocase'), name='vehicle_plate_search'),
+        ),
+    ]
@@ -1,14 +1,26 @@
+import logging
 import os
+import queue
 import re
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import timedelta, datetime, time
-from django.db import models
+from django.conf import settings
+from django.db import close_old_connections, models, transaction, IntegrityError
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Collate, Greatest
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.utils.timezone import localtime
 from django.core.exceptions import ValidationError
 
+logger = logging.getLogger(__name__)
+
 def rename_employee_image(instance, filename):
     
     # Get file extension
@@ -24,6 +36,9 @@ def validate_image_size(image):
     if image.size > max_size:
         raise ValidationError(_('Image size cannot exceed 5MB.'))
 
+# Personal and emergency contact numbers: optional leading +, then 10 to 15 digits
+PHONE_NUMBER_REGEX = re.compile(r'^\+?[0-9]{10,15}$')
+
 class Gender(models.TextChoices):
         MALE = 'Male', _('Male')
         FEMALE = 'Female', _('Female')
@@ -87,6 +102,91 @@ class Barangay(models.Model):
         db_table = 'refbrgy'
         managed = False
 
+class EmployeeManager(models.Manager):
+    def bulk_import(self, employees, batch_size=500):
+        """
+        Validate and create many unsaved employees in a constant number of queries.
+
+        Field and cross-field checks run per employee without touching the database;
+        the duplicate name and birth date check runs once for the whole batch, also
+        catching duplicates within the batch. Valid employees are bulk created and
+        given a payroll record in every period overlapping their date of employment.
+
+        Returns (created, errors): the saved employees, and a dict mapping the index
+        of each rejected employee to its ValidationError. Nothing is saved for
+        rejected employees.
+        """
+        employees = list(employees)
+        errors = {}
+        candidates = []
+
+        # Location references are checked once per table below instead of once per row
+        location_fields = [field for field in self.model._meta.concrete_fields if field.is_relation]
+        existing_locations = {}
+        for field in location_fields:
+            ids = {getattr(employee, field.attname) for employee in employees} - {None}
+            existing_locations[field.attname] = set(
+                field.related_model._base_manager.filter(pk__in=ids).values_list('pk', flat=True)
+            ) if ids else set()
+
+        for index, employee in enumerate(employees):
+            try:
+                employee.clean_fields(exclude=[field.name for field in location_fields])
+                for field in location_fields:
+                    value = getattr(employee, field.attname)
+                    if value is not None and value not in existing_locations[field.attname]:
+                        raise ValidationError({field.name: _('Select a valid %(field)s.') % {'field': field.verbose_name}})
+                employee.clean_details()
+            except ValidationError as e:
+                errors[index] = e
+            else:
+                candidates.append((index, employee))
+
+        # Superset of possible duplicates in one query, narrowed down in Python
+        existing = set()
+        if candidates:
+            existing = set(self.filter(
+                first_name__in={employee.first_name for index, employee in candidates},
+                last_name__in={employee.last_name for index, employee in candidates},
+                date_of_birth__in={employee.date_of_birth for index, employee in candidates}
+            ).values_list('first_name', 'last_name', 'date_of_birth'))
+
+        valid = []
+        for index, employee in candidates:
+            key = (employee.first_name, employee.last_name, employee.date_of_birth)
+            if key in existing:
+                errors[index] = Employee.duplicate_error()
+                continue
+            existing.add(key)
+            valid.append(employee)
+
+        if not valid:
+            return [], errors
+
+        with transaction.atomic():
+            # Image files are committed to storage here, as save() would through pre_save
+            for employee in valid:
+                employee.employee_image = employee._meta.get_field('employee_image').pre_save(employee, True)
+            created = self.bulk_create(valid, batch_size=batch_size)
+
+            active = [employee for employee in created if employee.is_active and employee.date_of_employment]
+            if active:
+                periods = list(PayrollPeriod.objects.filter(
+                    start_date__lte=max(employee.date_of_employment for employee in active),
+                    end_date__gte=min(employee.date_of_employment for employee in active)
+                ).values_list('pk', 'start_date', 'end_date'))
+
+                PayrollRecord.objects.bulk_upsert(
+                    (employee.pk, period_id)
+                    for employee in active
+                    for period_id, start_date, end_date in periods
+                    if start_date <= employee.date_of_employment <= end_date
+                )
+
+        for employee in created:
+            employee._loaded_values = employee._tracked_values()
+        return created, errors
+
 class Employee(models.Model):
     class HighestEducation(models.TextChoices):
         GRADESCHOOL = 'Grade School', _('Grade School')
@@ -120,30 +220,72 @@ class Employee(models.Model):
     absences = models.IntegerField(default=0, null=False)
     employee_image = models.ImageField(null=False, upload_to='images/', validators=[validate_image_size])
 
+    objects = EmployeeManager()
+
+    class Meta:
+        indexes = [
+            # Typeahead search (payroll_system.search): NOCASE indexes let SQLite answer
+            # the case-insensitive prefix (istartswith) lookups with a range scan
+            models.Index(Collate('last_name', 'nocase'), name='employee_last_name_search'),
+            models.Index(Collate('first_name', 'nocase'), name='employee_first_name_search'),
+            models.Index(Collate('contact_number', 'nocase'), name='employee_contact_search'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so changes can be detected without re-fetching the row
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        current_values = self._tracked_values()
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = current_values
+        else:
+            for name in fields:
+                attname = self._meta.get_field(name).attname
+                if attname in current_values:
+                    self._loaded_values[attname] = current_values[attname]
+
+    def _tracked_values(self):
+        """Current values of the loaded concrete fields, keyed by attname; files by name."""
+        deferred = self.get_deferred_fields()
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            value = getattr(self, field.attname)
+            values[field.attname] = value.name if isinstance(field, models.FileField) else value
+        return values
+
+    def get_dirty_fields(self):
+        """
+        Attnames of fields changed since the row was loaded or last saved,
+        or None when the instance was not loaded from the database.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return None
+
+        current_values = self._tracked_values()
+        return [
+            attname for attname, value in current_values.items()
+            if attname in loaded_values and loaded_values[attname] != value
+        ]
+
     def clean(self):
         # Call parent's clean method
         super().clean()
         
-        # Name validation
-        if self.first_name and self.first_name.strip() == '':
-            raise ValidationError({'first_name': _('First name cannot be empty.')})
-            
-        if self.last_name and self.last_name.strip() == '':
-            raise ValidationError({'last_name': _('Last name cannot be empty.')})
-        
-        # Location validation - ensure proper relationship between region, province, city
-        if self.city and not self.province:
-            raise ValidationError(_('Province must be specified if city is provided.'))
-            
-        if self.province and not self.region:
-            raise ValidationError(_('Region must be specified if province is provided.'))
-            
-        if self.barangay and not self.city:
-            raise ValidationError(_('City must be specified if barangay is provided.'))
-        
+        self.clean_details()
+        self.clean_duplicate()
+
+    def clean_duplicate(self):
         # Check for duplicate employees based on name and birth date
         if self.first_name and self.last_name and self.date_of_birth:
             existing_employees = Employee.objects.filter(
@@ -158,23 +300,45 @@ class Employee(models.Model):
             
             # If any match is found, raise a validation error
             if existing_employees.exists():
-                raise ValidationError({
-                    'first_name': "An employee with this name and birth date already exists.",
-                    'last_name': "Please verify this is not a duplicate entry or add a middle name to distinguish."
-                })
+                raise self.duplicate_error()
+
+    @staticmethod
+    def duplicate_error():
+        return ValidationError({
+            'first_name': "An employee with this name and birth date already exists.",
+            'last_name': "Please verify this is not a duplicate entry or add a middle name to distinguish."
+        })
+
+    def clean_details(self):
+        """Every model-level check that does not need a query."""
+        # Name validation
+        if self.first_name and self.first_name.strip() == '':
+            raise ValidationError({'first_name': _('First name cannot be empty.')})
+            
+        if self.last_name and self.last_name.strip() == '':
+            raise ValidationError({'last_name': _('Last name cannot be empty.')})
+        
+        # Location validation - ensure proper relationship between region, province, city
+        # (compared by id, so the related rows are not loaded)
+        if self.city_id and not self.province_id:
+            raise ValidationError(_('Province must be specified if city is provided.'))
+            
+        if self.province_id and not self.region_id:
+            raise ValidationError(_('Region must be specified if province is provided.'))
+            
+        if self.barangay_id and not self.city_id:
+            raise ValidationError(_('City must be specified if barangay is provided.'))
         
         # Validate contact number format
         if self.contact_number:
-            phone_regex = re.compile(r'^\+?[0-9]{10,15}$')
-            if not phone_regex.match(self.contact_number):
+            if not PHONE_NUMBER_REGEX.match(self.contact_number):
                 raise ValidationError({
                     'contact_number': _('Phone number must be entered in the format: "+999999999". 10-15 digits allowed.')
                 })
         
         # Validate emergency contact format
         if self.emergency_contact:
-            phone_regex = re.compile(r'^\+?[0-9]{10,15}$')
-            if not phone_regex.match(self.emergency_contact):
+            if not PHONE_NUMBER_REGEX.match(self.emergency_contact):
                 raise ValidationError({
                     'emergency_contact': _('Emergency contact must be entered in the format: "+999999999". 10-15 digits allowed.')
                 })
@@ -209,22 +373,40 @@ class Employee(models.Model):
             if age_at_employment < 18:
                 raise ValidationError({'date_of_employment': "Employee must be at least 18 years old at date of employment."})
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, validate=True, **kwargs):
+        """
+        Pass validate=False when the caller has already validated the instance
+        (e.g. a ModelForm, whose is_valid() runs full_clean()).
+        """
         is_new = self.pk is None  # Check if employee is newly created
+        loaded_values = getattr(self, '_loaded_values', None)
         
         # If employee exists, check for status change
         if not is_new:
-            try:
-                # Get the original employee instance before changes
-                original_employee = Employee.objects.get(pk=self.pk)
-                status_changed = not original_employee.is_active and self.is_active
-            except Employee.DoesNotExist:
-                status_changed = False
+            if loaded_values is not None and 'is_active' in loaded_values:
+                # Compare against the value loaded with the instance
+                status_changed = not loaded_values['is_active'] and self.is_active
+            else:
+                try:
+                    # Get the original employee instance before changes
+                    original_employee = Employee.objects.get(pk=self.pk)
+                    status_changed = not original_employee.is_active and self.is_active
+                except Employee.DoesNotExist:
+                    status_changed = False
+
+            # Only write the columns that changed; nothing changed means no UPDATE at all
+            if loaded_values is not None and not args and not kwargs.get('update_fields') and not kwargs.get('force_insert'):
+                kwargs['update_fields'] = [
+                    self._meta.get_field(attname).name
+                    for attname in self.get_dirty_fields()
+                ]
         else:
             status_changed = False
         
-        self.full_clean()
+        if validate:
+            self.full_clean()
         super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
 
         # Logic for new employee who is active
         if is_new and self.is_active and self.date_of_employment:
@@ -233,10 +415,10 @@ class Employee(models.Model):
                 end_date__gte=self.date_of_employment
             )
 
-            for period in overlapping_periods:
-                # Ensure not already added (e.g. duplicate save)
-                if not PayrollRecord.objects.filter(employee=self, payroll_period=period).exists():
-                    PayrollRecord.objects.create(employee=self, payroll_period=period)
+            # Pairs that already have a record (e.g. duplicate save) are skipped
+            PayrollRecord.objects.bulk_upsert(
+                (self.pk, period_id) for period_id in overlapping_periods.values_list('pk', flat=True)
+            )
         
         # Logic for employee status change from inactive to active
         elif status_changed:
@@ -252,10 +434,13 @@ class Employee(models.Model):
                 end_date__gte=today
             )
             
-            for period in active_payroll_periods:
-                # Ensure not already added
-                if not PayrollRecord.objects.filter(employee=self, payroll_period=period).exists():
-                    PayrollRecord.objects.create(employee=self, payroll_period=period)
+            # Pairs that already have a record are skipped; records in an in-progress
+            # period are flagged so attendance from before the deactivation is counted
+            for period_id, payroll_status in active_payroll_periods.values_list('pk', 'payroll_status'):
+                PayrollRecord.objects.bulk_upsert(
+                    [(self.pk, period_id)],
+                    needs_recalculation=payroll_status == PayrollPeriod.PayrollStatus.INPROGRESS
+                )
 
 class Attendance(models.Model):
     class AttendanceStatus(models.TextChoices):
@@ -278,6 +463,20 @@ class Attendance(models.Model):
     
     class Meta:
         ordering = ['date', 'time_in']
+        constraints = [
+            # At most one open (timed in, not yet timed out) session per employee per day
+            models.UniqueConstraint(
+                fields=['employee', 'date'],
+                condition=models.Q(time_in__isnull=False, time_out__isnull=True),
+                name='unique_open_attendance_session',
+            ),
+        ]
+        indexes = [
+            # Per-employee day lookups: summary refresh, latest attendance, profile ranges
+            models.Index(fields=['employee', 'date'], name='attendance_employee_date'),
+            # Company-wide date range reads filtered by status (summary rebuilds, reports)
+            models.Index(fields=['date', 'attendance_status'], name='attendance_date_status'),
+        ]
     
     def __str__(self):
         status = f"[{self.attendance_status}]"
@@ -318,12 +517,14 @@ class Attendance(models.Model):
         # Check if this is an update to an existing record
         is_update = self.pk is not None
         
-        # Store old status for comparison if this is an update
+        # Store old status and date for comparison if this is an update
         old_status = None
+        old_date = None
         if is_update:
             try:
                 old_attendance = Attendance.objects.get(pk=self.pk)
                 old_status = old_attendance.attendance_status
+                old_date = old_attendance.date
             except Attendance.DoesNotExist:
                 pass
         
@@ -337,11 +538,87 @@ class Attendance(models.Model):
         
         super().save(*args, **kwargs)
         
+        # Refresh the daily summary for this day (and the old day if the record moved)
+        DailyAttendanceSummary.refresh(self.employee_id, {self.date, old_date} - {None})
+        
         # If this is an update AND status changed OR this is a new entry
-        # then update related payroll records
+        # then flag related payroll records for recalculation
         if (is_update and old_status != self.attendance_status) or not is_update:
-            self.update_payroll_records()
+            self.mark_payroll_records_dirty()
+
+    # Deletes (including queryset and admin bulk deletes) are handled by attendance_deleted()
             
+    @classmethod
+    def open_session(cls, employee, date):
+        """Return the employee's open session for the given date, if any"""
+        return cls.objects.filter(
+            employee=employee,
+            date=date,
+            time_in__isnull=False,
+            time_out__isnull=True
+        ).first()
+
+    @classmethod
+    def clock_in(cls, employee, date, time_in):
+        """
+        Atomically open a session for the employee.
+        Returns (attendance, created); when a session is already open,
+        returns that session and created=False.
+        """
+        attendance = cls(
+            employee=employee,
+            date=date,
+            time_in=time_in,
+            attendance_status=cls.AttendanceStatus.PRESENT
+        )
+        
+        try:
+            # A single INSERT; the unique_open_attendance_session constraint
+            # rejects a second open session from a double submit or another kiosk
+            with transaction.atomic():
+                super(Attendance, attendance).save(force_insert=True)
+        except IntegrityError:
+            existing = cls.open_session(employee, date)
+            if existing is None:
+                raise
+            return existing, False
+        
+        DailyAttendanceSummary.refresh(employee.pk, [date])
+        attendance.mark_payroll_records_dirty()
+        return attendance, True
+
+    @classmethod
+    def clock_out(cls, employee, date, time_out):
+        """
+        Atomically close the employee's open session.
+        Returns the closed attendance, or None if there was no open session.
+        """
+        attendance = cls.open_session(employee, date)
+        if attendance is None:
+            return None
+        
+        if attendance.time_in >= time_out:
+            raise ValidationError(_('Time in must be before time out.'))
+        
+        attendance.time_out = time_out
+        attendance.calculate_hours_worked()
+        
+        # Conditional UPDATE: only succeeds if nobody else closed the session first
+        updated = cls.objects.filter(
+            pk=attendance.pk,
+            time_out__isnull=True
+        ).update(
+            time_out=attendance.time_out,
+            hours_worked=attendance.hours_worked,
+            updated_at=timezone.now()
+        )
+        
+        if not updated:
+            return None
+        
+        DailyAttendanceSummary.refresh(employee.pk, [date])
+        return attendance
+
     def get_formatted_hours_worked(self):
         # Returns time worked as hh:mm:ss if time_out exists
         if self.time_in and self.time_out:
@@ -354,42 +631,238 @@ class Attendance(models.Model):
             return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         return None
     
-    def update_payroll_records(self):
-        """Update payroll records affected by this attendance record"""
+    def mark_payroll_records_dirty(self):
+        """
+        Flag the payroll records affected by this attendance record for recalculation.
+        The records are recalculated once each when the surrounding transaction commits,
+        or at the end of the request (see queue_payroll_recalculation()).
+        """
         # Find all IN-PROGRESS payroll periods that include this attendance date
-        related_periods = PayrollPeriod.objects.filter(
+        related_period_ids = list(PayrollPeriod.objects.filter(
             start_date__lte=self.date,
             end_date__gte=self.date,
             payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS
-        )
+        ).values_list('payroll_period_id', flat=True))
+        
+        if not related_period_ids:
+            return
+        
+        # One UPDATE flags this employee's records in every affected period
+        flagged = PayrollRecord.objects.filter(
+            employee_id=self.employee_id,
+            payroll_period_id__in=related_period_ids
+        ).update(needs_recalculation=True)
         
-        # Update each payroll record for this employee in the affected periods
-        for period in related_periods:
+        # Create any missing record already flagged (rare: employee missing from the period)
+        if flagged < len(related_period_ids):
+            PayrollRecord.objects.bulk_upsert(
+                [(self.employee_id, period_id) for period_id in related_period_ids],
+                needs_recalculation=True
+            )
+        
+        queue_payroll_recalculation((self.employee_id, period_id) for period_id in related_period_ids)
+
+# (employee_id, payroll_period_id) pairs flagged by attendance writes and not yet handed
+# to the recalculation worker, per thread, plus how many requests on the thread are deferring them
+_recalculation_queue = threading.local()
+
+def queue_payroll_recalculation(pairs):
+    """
+    Queue flagged (employee_id, payroll_period_id) pairs for recalculation.
+
+    Outside a request the queue is flushed when the current transaction commits
+    (immediately in autocommit mode). During a request deferred by
+    PayrollRecalculationMiddleware it is flushed once when the response is ready,
+    so a view that writes many attendance rows queues each record once.
+    """
+    pending = getattr(_recalculation_queue, 'pending', None)
+    if pending is None:
+        pending = _recalculation_queue.pending = set()
+    pending.update(pairs)
+    
+    if not getattr(_recalculation_queue, 'deferred', 0):
+        # Every write registers a hook, but the first one to run drains the whole queue
+        transaction.on_commit(flush_payroll_recalculation)
+
+@contextmanager
+def deferred_payroll_recalculation():
+    """
+    Hold queued recalculations until the block exits, then flush them once.
+    Nested blocks flush when the outermost one exits. The queue is flushed even
+    when the block raises, so it never carries over to the next request on this
+    thread; writes that were rolled back left no flags, so their records are skipped.
+    """
+    _recalculation_queue.deferred = getattr(_recalculation_queue, 'deferred', 0) + 1
+    try:
+        yield
+    finally:
+        _recalculation_queue.deferred -= 1
+        if not _recalculation_queue.deferred:
+            flush_payroll_recalculation()
+
+def flush_payroll_recalculation():
+    """
+    Hand the records queued by attendance writes to the recalculation worker, or
+    recalculate them here when settings.PAYROLL_RECALCULATION_IN_BACKGROUND is False.
+    Returns the number recalculated here.
+    """
+    pending = getattr(_recalculation_queue, 'pending', None)
+    if not pending:
+        return 0
+    _recalculation_queue.pending = set()
+    
+    if getattr(settings, 'PAYROLL_RECALCULATION_IN_BACKGROUND', True):
+        _recalculation_worker.submit(pending)
+        return 0
+    return PayrollRecord.recalculate_dirty(pairs=pending)
+
+class PayrollRecalculationWorker:
+    """
+    A daemon thread that recalculates the records attendance writes flagged, so
+    the punch request only flags and queues them. Batches that arrive while one
+    is being recalculated are merged and recalculated together.
+
+    The thread does not outlive the process: records still queued at exit stay
+    flagged and are recalculated by the recalculate_payroll command, or when
+    their period is confirmed or printed.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, pairs):
+        self.queue.put(set(pairs))
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='payroll-recalculation', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            pairs = self.queue.get()
+            while True:
+                try:
+                    pairs |= self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            
             try:
-                # Get the payroll record for this employee and period
-                payroll_record = PayrollRecord.objects.get(
-                    employee=self.employee,
-                    payroll_period=period
-                )
-                
-                # Recalculate days worked for this specific record
-                previous_days = payroll_record.days_worked
-                new_days = payroll_record.calculate_days_worked()
-                
-                # Only update if the number of days has changed
-                if previous_days != new_days:
-                    payroll_record.days_worked = new_days
-                    payroll_record.gross_pay = payroll_record.calculate_gross_pay()
-                    payroll_record.net_pay = payroll_record.calculate_net_pay()
-                    payroll_record.save(update_fields=['days_worked', 'gross_pay', 'net_pay'])
-                    
-            except PayrollRecord.DoesNotExist:
-                # Create a new record if one doesn't exist
-                PayrollRecord.objects.create(
-                    employee=self.employee,
-                    payroll_period=period
+                PayrollRecord.recalculate_dirty(pairs=pairs)
+            except Exception:
+                # The records stay flagged for the next batch or the recalculate_payroll command
+                logger.exception("Background payroll recalculation failed for %d record(s)", len(pairs))
+            finally:
+                close_old_connections()
+
+_recalculation_worker = PayrollRecalculationWorker()
+
+class DailyAttendanceSummary(models.Model):
+    """
+    One row per employee per day, derived from that day's Attendance records.
+    Kept current by Attendance writes and rebuilt by the rebuild_attendance_summary
+    command, so reports count days with indexed range reads instead of DISTINCT scans.
+    """
+    summary_id = models.AutoField(primary_key=True)
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='daily_attendance')
+    date = models.DateField()
+    present = models.BooleanField(default=False)
+    absent = models.BooleanField(default=False)
+    first_in = models.TimeField(null=True, blank=True)
+    last_out = models.TimeField(null=True, blank=True)
+    total_hours = models.FloatField(default=0)
+
+    SUMMARY_FIELDS = ['present', 'absent', 'first_in', 'last_out', 'total_hours']
+
+    class Meta:
+        constraints = [
+            # Also serves per-employee date range reads
+            models.UniqueConstraint(fields=['employee', 'date'], name='unique_daily_attendance_summary'),
+        ]
+        indexes = [
+            # Company-wide present/absent counts over a date range
+            models.Index(fields=['date', 'present'], name='daily_attendance_date_present'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} ({'present' if self.present else 'absent'})"
+
+    @classmethod
+    def summarize(cls, attendances):
+        """Yield unsaved summary rows for an Attendance queryset, grouped by employee and day"""
+        rows = attendances.order_by().values('employee_id', 'date').annotate(
+            present_count=Count('pk', filter=Q(attendance_status=Attendance.AttendanceStatus.PRESENT)),
+            absent_count=Count('pk', filter=Q(attendance_status=Attendance.AttendanceStatus.ABSENT)),
+            first_in=Min('time_in'),
+            last_out=Max('time_out'),
+            total_hours=Sum('hours_worked'),
+        )
+        
+        for row in rows.iterator(chunk_size=2000):
+            yield cls(
+                employee_id=row['employee_id'],
+                date=row['date'],
+                present=row['present_count'] > 0,
+                absent=row['absent_count'] > 0,
+                first_in=row['first_in'],
+                last_out=row['last_out'],
+                total_hours=row['total_hours'] or 0,
+            )
+
+    @classmethod
+    def refresh(cls, employee_id, dates):
+        """Recompute the employee's summary rows for the given dates"""
+        dates = set(dates)
+        
+        with transaction.atomic():
+            summaries = list(cls.summarize(Attendance.objects.filter(employee_id=employee_id, date__in=dates)))
+            
+            # Days left without any attendance lose their summary row
+            empty_dates = dates - {summary.date for summary in summaries}
+            if empty_dates:
+                cls.objects.filter(employee_id=employee_id, date__in=empty_dates).delete()
+            
+            if summaries:
+                cls.objects.bulk_create(
+                    summaries,
+                    update_conflicts=True,
+                    unique_fields=['employee', 'date'],
+                    update_fields=cls.SUMMARY_FIELDS
                 )
-    
+
+    @classmethod
+    def rebuild(cls, start_date=None, end_date=None, batch_size=1000):
+        """
+        Rebuild the summary from Attendance, optionally only between start_date and end_date.
+        Returns the number of summary rows written.
+        """
+        attendances = Attendance.objects.all()
+        summaries = cls.objects.all()
+        if start_date:
+            attendances = attendances.filter(date__gte=start_date)
+            summaries = summaries.filter(date__gte=start_date)
+        if end_date:
+            attendances = attendances.filter(date__lte=end_date)
+            summaries = summaries.filter(date__lte=end_date)
+        
+        written = 0
+        with transaction.atomic():
+            summaries.delete()
+            
+            batch = []
+            for summary in cls.summarize(attendances):
+                batch.append(summary)
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            
+            cls.objects.bulk_create(batch)
+            written += len(batch)
+        
+        return written
+
 class PayrollPeriod(models.Model):
     class PayrollStatus(models.TextChoices):
         PENDING = 'PENDING', _('Pending')
@@ -407,6 +880,18 @@ class PayrollPeriod(models.Model):
     payment_date = models.DateField(null=False)
     payroll_status = models.CharField(max_length=11, choices=PayrollStatus.choices, default=PayrollStatus.PENDING)
     type = models.CharField(max_length=9, choices=Type.choices)
+    # Period totals, frozen by confirm() so history and charts never re-aggregate records
+    total_net_pay = models.FloatField(default=0)
+    total_gross = models.FloatField(default=0)
+    total_deductions = models.FloatField(default=0)
+    headcount = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Status filters ordered or ranged by end date: history, charts, next period lookups,
+            # and the in-progress periods covering a date that attendance writes look up
+            models.Index(fields=['payroll_status', 'end_date'], name='payroll_period_status_end'),
+        ]
 
     def save(self, *args, **kwargs):
         today = localtime(timezone.now()).date()
@@ -421,14 +906,17 @@ class PayrollPeriod(models.Model):
         if self.end_date:
             self.payment_date = self.end_date
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        if is_new:
-            active_employees = Employee.objects.filter(is_active=True)
-            for employee in active_employees:
-                PayrollRecord.objects.create(
-                    employee=employee,
-                    payroll_period=self
+            if is_new:
+                # Seed one record per active employee in a single INSERT; the
+                # (employee, payroll_period) constraint makes re-seeding a no-op
+                active_employee_ids = Employee.objects.filter(is_active=True).values_list('pk', flat=True)
+                PayrollRecord.objects.bulk_create(
+                    [PayrollRecord(employee_id=employee_id, payroll_period=self) for employee_id in active_employee_ids],
+                    batch_size=500,
+                    ignore_conflicts=True
                 )
 
     def generate(self):
@@ -452,26 +940,78 @@ class PayrollPeriod(models.Model):
         self.payroll_status = self.PayrollStatus.INPROGRESS
         self.save()
 
-        # Calculate all records in this period
-        for record in self.payroll_records.all():
-            # Calculate days worked
-            record.days_worked = record.calculate_days_worked()
-            record.gross_pay = record.calculate_gross_pay()
-            record.save()
-            
-            # Calculate net pay after saving (so deductions are properly accounted for)
-            record.net_pay = record.calculate_net_pay()
-            record.save(update_fields=['net_pay'])
+        # Calculate all records in this period with set-based queries
+        records = list(self.payroll_records.select_related('employee', 'payroll_period'))
+        PayrollRecord.recalculate_records(records)
     
     def recalculate_all_records(self):
         """Force recalculation of all payroll records in this period"""
         if self.payroll_status == self.PayrollStatus.PROCESSED:
             return False
             
-        for record in self.payroll_records.all():
-            record.recalculate_and_save()
+        records = list(self.payroll_records.select_related('employee', 'payroll_period'))
+        PayrollRecord.recalculate_records(records)
         return True
     
+    def apply_deduction(self, deduction_type, amount):
+        """
+        Add a deduction of `deduction_type` to every record in this period that
+        does not have one yet, in a constant number of queries.
+        Returns (added_count, skipped_count).
+        """
+        with transaction.atomic():
+            has_deduction = Deduction.objects.filter(
+                payroll_record=OuterRef('pk'),
+                deduction_type=deduction_type
+            )
+            records = list(self.payroll_records.annotate(
+                has_deduction=Exists(has_deduction)
+            ).values_list('pk', 'has_deduction'))
+            new_record_ids = [record_id for record_id, has_deduction in records if not has_deduction]
+            
+            if new_record_ids:
+                # Net pay is set before total_deductions is bumped, so both read the old total
+                PayrollRecord.objects.filter(pk__in=new_record_ids).update(
+                    net_pay=Greatest(F('gross_pay') - F('total_deductions') - amount, Value(0.0)),
+                    total_deductions=F('total_deductions') + amount
+                )
+                Deduction.objects.bulk_create(
+                    [
+                        Deduction(payroll_record_id=record_id, deduction_type=deduction_type, amount=amount)
+                        for record_id in new_record_ids
+                    ],
+                    batch_size=500
+                )
+        
+        return len(new_record_ids), len(records) - len(new_record_ids)
+
+    def adjust_incentives(self, amount, subtract=False):
+        """
+        Add `amount` to (or subtract it from, never below zero) every record's
+        incentives in this period, recomputing gross and net pay in the same
+        UPDATE. Returns the number of records updated.
+        """
+        if subtract:
+            incentives = Greatest(F('incentives') - amount, Value(0.0))
+        else:
+            incentives = F('incentives') + amount
+        
+        # UPDATE can't join, so the employee's rate comes from a correlated subquery
+        daily_rate = Subquery(
+            Employee.objects.filter(pk=OuterRef('employee_id')).values('daily_rate')[:1]
+        )
+        
+        # SET expressions all see the row's old values, so net pay repeats the gross pay expression
+        gross_pay = Greatest(F('days_worked') * daily_rate + incentives, Value(0.0))
+        net_pay = Greatest(gross_pay - F('total_deductions'), Value(0.0))
+        
+        with transaction.atomic():
+            return self.payroll_records.update(
+                incentives=incentives,
+                gross_pay=gross_pay,
+                net_pay=net_pay
+            )
+
     def confirm(self):
         """
         Confirm and finalize this payroll period.
@@ -491,52 +1031,99 @@ class PayrollPeriod(models.Model):
         if self.payroll_status != self.PayrollStatus.INPROGRESS:
             raise ValidationError("Only payroll periods with IN-PROGRESS status can be confirmed.")
         
-        # Check all payroll records for cash advances
-        # and transfer them to the next available payroll period
-        self._transfer_cash_advances()
-        
-        # Set status to PROCESSED
-        self.payroll_status = self.PayrollStatus.PROCESSED
-        self.save()
+        # Recalculation, carry-over and the status change succeed or fail together
+        with transaction.atomic():
+            # Bring records flagged by late attendance changes up to date before freezing them
+            PayrollRecord.recalculate_dirty(payroll_period=self)
+            
+            # Check all payroll records for cash advances
+            # and transfer them to the next available payroll period
+            self._transfer_cash_advances()
+            
+            # Freeze the period totals and set status to PROCESSED
+            self.freeze_totals()
+            self.payroll_status = self.PayrollStatus.PROCESSED
+            self.save()
         
         return True
 
+    def freeze_totals(self):
+        """Store this period's net pay, gross pay, deductions and headcount from its records in one aggregate."""
+        totals = self.payroll_records.aggregate(
+            total_net_pay=Sum('net_pay'),
+            total_gross=Sum('gross_pay'),
+            total_deductions=Sum('total_deductions'),
+            headcount=Count('pk'),
+        )
+        for field, value in totals.items():
+            setattr(self, field, value or 0)
+
     def _transfer_cash_advances(self):
         """
         Transfer cash advances from this payroll period to the next available one
         as deductions of type OTHERS.
         """
         # Get all payroll records in this period with cash advances
-        records_with_advances = self.payroll_records.filter(cash_advance__gt=0)
+        records_with_advances = list(self.payroll_records.filter(cash_advance__gt=0))
+        if not records_with_advances:
+            return
         
-        for record in records_with_advances:
-            # Find the next payroll period for this employee
-            next_period = PayrollPeriod.objects.filter(
-                start_date__gt=self.end_date,
-                payroll_status__in=[
-                    PayrollPeriod.PayrollStatus.PENDING,
-                    PayrollPeriod.PayrollStatus.INPROGRESS
-                ]
-            ).order_by('start_date').first()
+        # The next payroll period is the same for every employee
+        next_period = PayrollPeriod.objects.filter(
+            start_date__gt=self.end_date,
+            payroll_status__in=[
+                PayrollPeriod.PayrollStatus.PENDING,
+                PayrollPeriod.PayrollStatus.INPROGRESS
+            ]
+        ).order_by('start_date').first()
+        
+        if not next_period:
+            return
+        
+        with transaction.atomic():
+            # Make sure every employee has a record in the next period, then lock and load them in one query
+            PayrollRecord.objects.bulk_upsert(
+                [(record.employee_id, next_period.pk) for record in records_with_advances],
+                needs_recalculation=next_period.payroll_status == PayrollPeriod.PayrollStatus.INPROGRESS
+            )
+            next_records = {
+                next_record.employee_id: next_record
+                for next_record in next_period.payroll_records.select_for_update().filter(
+                    employee_id__in=[record.employee_id for record in records_with_advances]
+                )
+            }
             
-            if next_period:
-                # Get or create a payroll record for the employee in the next period
-                next_record, created = PayrollRecord.objects.get_or_create(
-                    employee=record.employee,
-                    payroll_period=next_period
+            # Existing OTHERS deductions absorb the advance instead of failing the uniqueness check
+            existing_deductions = {
+                deduction.payroll_record_id: deduction
+                for deduction in Deduction.objects.filter(
+                    payroll_record__in=next_records.values(),
+                    deduction_type=Deduction.DeductionType.OTHERS
                 )
+            }
+            
+            new_deductions = []
+            for record in records_with_advances:
+                next_record = next_records[record.employee_id]
                 
-                # Create a deduction of type OTHERS with the cash advance amount
-                Deduction.objects.create(
-                    payroll_record=next_record,
-                    deduction_type=Deduction.DeductionType.OTHERS,
-                    amount=record.cash_advance
-                )
+                deduction = existing_deductions.get(next_record.payroll_record_id)
+                if deduction:
+                    deduction.amount += record.cash_advance
+                else:
+                    # Create a deduction of type OTHERS with the cash advance amount
+                    new_deductions.append(Deduction(
+                        payroll_record=next_record,
+                        deduction_type=Deduction.DeductionType.OTHERS,
+                        amount=record.cash_advance
+                    ))
                 
                 # Update the next record's net pay to reflect the new deduction
-                if not created:  # Only recalculate if it's an existing record
-                    next_record.net_pay = next_record.calculate_net_pay()
-                    next_record.save(update_fields=['net_pay'])
+                next_record.total_deductions += record.cash_advance
+                next_record.net_pay = max(0, next_record.calculate_net_pay())
+            
+            Deduction.objects.bulk_update(existing_deductions.values(), ['amount'], batch_size=500)
+            Deduction.objects.bulk_create(new_deductions, batch_size=500)
+            PayrollRecord.objects.bulk_update(next_records.values(), ['total_deductions', 'net_pay'], batch_size=500)
 
     def __str__(self):
         return f"{self.start_date} to {self.end_date} ({self.get_payroll_status_display()})"
@@ -559,7 +1146,7 @@ class Deduction(models.Model):
         # Check if a deduction of this type already exists for this payroll record
         if self.payroll_record_id and self.deduction_type:
             existing_deduction = Deduction.objects.filter(
-                payroll_record=self.payroll_record,
+                payroll_record_id=self.payroll_record_id,
                 deduction_type=self.deduction_type
             )
             
@@ -575,11 +1162,88 @@ class Deduction(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            # Take the previous amount back off the record it was counted on
+            if not self._state.adding:
+                previous = Deduction.objects.filter(pk=self.pk).values_list('payroll_record_id', 'amount').first()
+                if previous:
+                    PayrollRecord.objects.adjust_deductions(previous[0], -previous[1])
+            
+            super().save(*args, **kwargs)
+            
+            PayrollRecord.objects.adjust_deductions(self.payroll_record_id, self.amount)
+        
+        # Keep a record instance the caller holds in step with the row
+        if Deduction.payroll_record.is_cached(self):
+            self.payroll_record.refresh_from_db(fields=['total_deductions', 'net_pay'])
+
+    # Deletes (including queryset and admin bulk deletes) are handled by deduction_deleted()
 
     def __str__(self):
         return self.deduction_type
 
+class PayrollRecordManager(models.Manager):
+    """
+    Race-safe access to the single PayrollRecord per (employee, payroll_period).
+    Relies on the unique_employee_payroll_period constraint instead of
+    check-then-create, so concurrent writers cannot create duplicates.
+    """
+
+    def bulk_upsert(self, pairs, needs_recalculation=False):
+        """
+        Ensure a record exists for every (employee_id, payroll_period_id) pair
+        with one INSERT that skips pairs which already have a record.
+        Existing records are left untouched.
+        """
+        records = [
+            self.model(employee_id=employee_id, payroll_period_id=payroll_period_id, needs_recalculation=needs_recalculation)
+            for employee_id, payroll_period_id in pairs
+        ]
+        self.bulk_create(records, batch_size=500, ignore_conflicts=True)
+
+    def upsert(self, employee_id, payroll_period_id, **fields):
+        """
+        Insert the record for this employee and period, or update `fields` on the
+        existing one, in a single statement. Returns the stored record.
+        """
+        record = self.model(employee_id=employee_id, payroll_period_id=payroll_period_id, **fields)
+        if fields:
+            self.bulk_create(
+                [record],
+                update_conflicts=True,
+                unique_fields=['employee', 'payroll_period'],
+                update_fields=list(fields)
+            )
+        else:
+            self.bulk_create([record], ignore_conflicts=True)
+        
+        return self.get(employee_id=employee_id, payroll_period_id=payroll_period_id)
+
+    def adjust_deductions(self, payroll_record_id, amount):
+        """
+        Add `amount` (negative to take it off) to a record's total deductions and
+        take it off its net pay, never below zero, in a single UPDATE.
+        """
+        # Net pay is set before total_deductions changes, so both read the old total
+        self.filter(pk=payroll_record_id).update(
+            net_pay=Greatest(F('gross_pay') - F('total_deductions') - amount, Value(0.0)),
+            total_deductions=F('total_deductions') + amount
+        )
+
+    def get_for_update(self, employee_id, payroll_period_id):
+        """
+        Return the record for this employee and period, creating it if missing,
+        with its row locked until the surrounding transaction ends.
+        Must be called inside transaction.atomic().
+        """
+        self.bulk_upsert([(employee_id, payroll_period_id)])
+        return self.select_related('employee', 'payroll_period').select_for_update(of=('self',)).get(
+            employee_id=employee_id,
+            payroll_period_id=payroll_period_id
+        )
+
+
 class PayrollRecord(models.Model):
     payroll_record_id = models.AutoField(primary_key=True)
     days_worked = models.IntegerField(default=0)
@@ -587,16 +1251,43 @@ class PayrollRecord(models.Model):
     incentives = models.FloatField(default=0)
     cash_advance = models.FloatField(default=0)
     net_pay = models.FloatField(default=0)
+    # Sum of this record's deductions, maintained by Deduction.save() and deduction_deleted()
+    total_deductions = models.FloatField(default=0)
     employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='payroll_records')
     payroll_period = models.ForeignKey('PayrollPeriod', on_delete=models.CASCADE, related_name='payroll_records')
+    # Set by attendance writes, cleared by recalculate_dirty()
+    needs_recalculation = models.BooleanField(default=False)
+    # When days worked, gross and net pay were last recomputed from attendance
+    recalculated_at = models.DateTimeField(null=True, blank=True)
+
+    objects = PayrollRecordManager()
+
+    class Meta:
+        constraints = [
+            # One payroll record per employee per period
+            models.UniqueConstraint(
+                fields=['employee', 'payroll_period'],
+                name='unique_employee_payroll_period',
+            ),
+        ]
+        indexes = [
+            # Period pages and batch recalculation filter by period, then by employee
+            models.Index(fields=['payroll_period', 'employee'], name='payroll_record_period_emp'),
+            # Only the few flagged rows are indexed, instead of every record's flag
+            models.Index(
+                fields=['payroll_period'],
+                condition=models.Q(needs_recalculation=True),
+                name='payroll_record_dirty',
+            ),
+        ]
 
     def calculate_days_worked(self):
         """Calculate the number of days worked in this payroll period"""
-        return Attendance.objects.filter(
-            employee=self.employee,
-            attendance_status=Attendance.AttendanceStatus.PRESENT,
+        return DailyAttendanceSummary.objects.filter(
+            employee_id=self.employee_id,
+            present=True,
             date__range=(self.payroll_period.start_date, self.payroll_period.end_date)
-        ).values('date').distinct().count()
+        ).count()
 
     def calculate_gross_pay(self):
         """Calculate gross pay based on days worked and employee rate"""
@@ -604,8 +1295,8 @@ class PayrollRecord(models.Model):
         return max(0, gross)  # Ensure gross pay is never negative
 
     def calculate_total_deductions(self):
-        """Calculate the sum of all deductions"""
-        return sum(d.amount for d in self.deductions.all())
+        """Return the sum of all deductions, kept up to date by Deduction.save() and deduction_deleted()"""
+        return self.total_deductions
 
     def calculate_net_pay(self):
         """Calculate net pay after deductions (cash advance is NOT deducted)"""
@@ -613,6 +1304,76 @@ class PayrollRecord(models.Model):
         net = self.gross_pay - total_deductions
         return max(0, net)  # Ensure net pay is never negative
 
+    @classmethod
+    def recalculate_records(cls, records):
+        """
+        Recalculate days worked, gross pay and net pay for a list of records
+        (with employee and payroll_period loaded) in a constant number of queries:
+        one grouped daily-summary query per period and a single bulk_update.
+        """
+        if not records:
+            return
+        
+        # Present days per employee from the daily summary, one query per affected period
+        records_by_period = defaultdict(list)
+        for record in records:
+            records_by_period[record.payroll_period].append(record)
+        
+        days_worked = {}
+        for period, period_records in records_by_period.items():
+            counts = DailyAttendanceSummary.objects.filter(
+                employee_id__in=[record.employee_id for record in period_records],
+                present=True,
+                date__range=(period.start_date, period.end_date)
+            ).values('employee_id').annotate(days=Count('pk'))
+            
+            for row in counts:
+                days_worked[(period.payroll_period_id, row['employee_id'])] = row['days']
+        
+        recalculated_at = timezone.now()
+        for record in records:
+            record.needs_recalculation = False
+            record.recalculated_at = recalculated_at
+            record.days_worked = days_worked.get((record.payroll_period_id, record.employee_id), 0)
+            record.gross_pay = max(0, record.calculate_gross_pay())
+            record.net_pay = max(0, record.calculate_net_pay())
+        
+        cls.objects.bulk_update(
+            records,
+            ['days_worked', 'gross_pay', 'net_pay', 'needs_recalculation', 'recalculated_at'],
+            batch_size=500
+        )
+
+    @classmethod
+    def recalculate_dirty(cls, payroll_period=None, pairs=None):
+        """
+        Recalculate every record flagged by attendance writes, once each,
+        using one grouped daily-summary query per period. `pairs` limits it
+        to the given (employee_id, payroll_period_id) pairs.
+        Returns the number of records recalculated.
+        """
+        dirty_records = cls.objects.filter(needs_recalculation=True)
+        if payroll_period is not None:
+            dirty_records = dirty_records.filter(payroll_period=payroll_period)
+        if pairs is not None:
+            # Filter on both columns to use the (payroll_period, employee) index; the
+            # combinations that were not queued are dirty too, so recalculating them is harmless
+            dirty_records = dirty_records.filter(
+                payroll_period_id__in={period_id for _, period_id in pairs},
+                employee_id__in={employee_id for employee_id, _ in pairs},
+            )
+        
+        with transaction.atomic():
+            # The rows stay locked until the flags are cleared and the new values written, so a
+            # punch that flags one of them meanwhile waits and flags it again after this commits
+            records = list(dirty_records.select_related('employee', 'payroll_period').select_for_update(of=('self',)))
+            if not records:
+                return 0
+            
+            cls.recalculate_records(records)
+        
+        return len(records)
+
     def save(self, *args, **kwargs):
         # Skip calculations if update_fields is specified (to avoid recursion)
         if kwargs.get('update_fields'):
@@ -625,14 +1386,18 @@ class PayrollRecord(models.Model):
             self.days_worked = max(0, self.calculate_days_worked())  # Ensure days_worked is never negative
             self.gross_pay = max(0, self.calculate_gross_pay())  # Ensure gross_pay is never negative
             
-            # First save to make sure we have an ID
-            super().save(*args, **kwargs)
-            
-            # Then update net pay
+            # Total deductions is stored on the row, so net pay needs no second save
             self.net_pay = max(0, self.calculate_net_pay())  # Ensure net_pay is never negative
-            super().save(update_fields=['net_pay'])
-        else:
-            super().save(*args, **kwargs)
+            self.recalculated_at = timezone.now()
+        
+        # total_deductions is maintained by Deduction with F() updates;
+        # never write back a copy that may be stale
+        if not self._state.adding:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'total_deductions'
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee} | {self.payroll_period.start_date} - {self.net_pay:.2f} net pay"
@@ -669,6 +1434,14 @@ class Customer(models.Model):
     city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, to_field='id')
     barangay = models.ForeignKey(Barangay, on_delete=models.SET_NULL, null=True, to_field='id')
 
+    class Meta:
+        indexes = [
+            # Typeahead search prefixes, see Employee.Meta
+            models.Index(Collate('last_name', 'nocase'), name='customer_last_name_search'),
+            models.Index(Collate('first_name', 'nocase'), name='customer_first_name_search'),
+            models.Index(Collate('contact_number', 'nocase'), name='customer_contact_search'),
+        ]
+
     def clean(self):
         # Name validation
         if self.first_name and self.first_name.strip() == '':
@@ -709,6 +1482,12 @@ class Vehicle(models.Model):
     vehicle_color = models.CharField(max_length=100, null=False)
     plate_number = models.CharField(max_length=100, null=False)
 
+    class Meta:
+        indexes = [
+            # Typeahead search by plate prefix, see Employee.Meta
+            models.Index(Collate('plate_number', 'nocase'), name='vehicle_plate_search'),
+        ]
+
     def __str__(self):
         return f"{self.vehicle_name} ({self.plate_number})"
     
@@ -780,4 +1559,30 @@ class Task(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+def _deleted_by_cascade(origin, model):
+    """True if the delete started from another model (an instance or queryset `origin`) and cascaded here."""
+    if origin is None:
+        return False
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return origin_model is not model
+
+# post_delete runs for every deleted row, whether it went through Model.delete(),
+# QuerySet.delete() or the admin's "delete selected" action, so derived values are kept
+# in step here rather than in delete() overrides
+
+@receiver(post_delete, sender=Deduction)
+def deduction_deleted(sender, instance, origin=None, **kwargs):
+    # Take the amount back off the record's stored totals (a no-op when the record itself is being deleted)
+    PayrollRecord.objects.adjust_deductions(instance.payroll_record_id, -instance.amount)
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    # When the employee is being deleted their summaries and payroll records go with them;
+    # refreshing or flagging them here would recreate rows for a deleted employee
+    if _deleted_by_cascade(origin, Attendance):
+        return
+    DailyAttendanceSummary.refresh(instance.employee_id, [instance.date])
+    instance.mark_payroll_records_dirty()
@@ -0,0 +1,36 @@
+"""
+Request-scoped coalescing of payroll recalculation.
+
+Attendance writes flag the affected PayrollRecords and queue them with
+queue_payroll_recalculation(). Without this middleware each write's queue
+is flushed as soon as its transaction commits; with it, the queue is
+flushed once after the view has returned, so a request that writes many
+attendance rows hands each affected record over once.
+
+Flushing only hands the records to the background PayrollRecalculationWorker
+(see models.py), so the punch request itself never recalculates payroll. The
+dashboard, employee profile and payroll pages show the new values as soon as
+the worker has run, without a separate recalculate_payroll process.
+"""
+import logging
+from .models import deferred_payroll_recalculation
+
+logger = logging.getLogger(__name__)
+
+
+class PayrollRecalculationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = None
+        try:
+            with deferred_payroll_recalculation():
+                response = self.get_response(request)
+        except Exception:
+            # The view's own exceptions propagate unchanged; a failed flush only leaves the
+            # records flagged for the next flush or the recalculate_payroll command
+            if response is None:
+                raise
+            logger.exception("Deferred payroll recalculation failed for %s", request.path)
+        return response
@@ -0,0 +1,194 @@
+"""
+Per-view query instrumentation.
+
+QueryInstrumentationMiddleware times every SQL statement a request runs and
+folds the result into process-wide per-view aggregates: request count, query
+count, total SQL time, the slowest statements and statement shapes repeated
+within a single request (the signature of an N+1 loop).
+
+It is off unless settings.QUERY_INSTRUMENTATION is True. When off the
+middleware raises MiddlewareNotUsed, so Django drops it from the chain and
+requests pay nothing for it.
+
+Settings:
+    QUERY_INSTRUMENTATION        enable the middleware (default False)
+    QUERY_BUDGET                 queries allowed per request (default 50)
+    QUERY_BUDGETS                per-view overrides, e.g. {'payroll_system:dashboard': 10}
+    QUERY_BUDGET_STRICT          raise QueryBudgetExceeded instead of logging (default False)
+    QUERY_REPEAT_THRESHOLD       repeats of one shape in a request flagged as N+1 (default 5)
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Number of slowest statements and repeated shapes kept per view
+SLOWEST_STATEMENTS_LIMIT = 5
+REPEATED_SHAPES_LIMIT = 5
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request runs more queries than its view's budget."""
+
+
+def statement_shape(sql):
+    """Normalize a statement so the same query with different parameters has one shape."""
+    shape = STRING_LITERAL.sub('?', sql)
+    shape = NUMBER_LITERAL.sub('?', shape)
+    shape = IN_LIST.sub('IN (...)', shape)
+    return WHITESPACE.sub(' ', shape).strip()
+
+
+def get_query_budget(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET', 50))
+
+
+class RequestQueries:
+    """Execute wrapper that records the statements run while it is installed."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((sql, (time.perf_counter() - started) * 1000))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_ms(self):
+        return sum(duration for sql, duration in self.statements)
+
+    def repeated_shapes(self, threshold):
+        """Shapes run at least `threshold` times in this request, most repeated first."""
+        counts = {}
+        for sql, duration in self.statements:
+            shape = statement_shape(sql)
+            counts[shape] = counts.get(shape, 0) + 1
+        repeated = [(count, shape) for shape, count in counts.items() if count >= threshold]
+        return sorted(repeated, reverse=True)
+
+
+class QueryStats:
+    """Thread-safe per-view aggregates shared by every request in the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, queries, budget, repeat_threshold):
+        repeated = queries.repeated_shapes(repeat_threshold)
+
+        with self.lock:
+            stats = self.views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'sql_ms': 0.0,
+                'over_budget': 0,
+                'budget': budget,
+                'slowest': [],
+                'repeated': {},
+            })
+            stats['requests'] += 1
+            stats['queries'] += queries.count
+            stats['max_queries'] = max(stats['max_queries'], queries.count)
+            stats['sql_ms'] += queries.total_ms
+            stats['budget'] = budget
+            if queries.count > budget:
+                stats['over_budget'] += 1
+
+            # Keep the slowest statements seen for this view as a min-heap of (ms, sql)
+            for sql, duration in queries.statements:
+                if len(stats['slowest']) < SLOWEST_STATEMENTS_LIMIT:
+                    heapq.heappush(stats['slowest'], (duration, sql))
+                elif duration > stats['slowest'][0][0]:
+                    heapq.heapreplace(stats['slowest'], (duration, sql))
+
+            # Highest per-request repeat count seen for each shape
+            for count, shape in repeated:
+                stats['repeated'][shape] = max(stats['repeated'].get(shape, 0), count)
+
+        return repeated
+
+    def snapshot(self):
+        """Aggregates as plain data, heaviest views (by total queries) first."""
+        with self.lock:
+            views = []
+            for view_name, stats in self.views.items():
+                repeated = sorted(stats['repeated'].items(), key=lambda item: item[1], reverse=True)
+                views.append({
+                    'view': view_name,
+                    'requests': stats['requests'],
+                    'avg_queries': round(stats['queries'] / stats['requests'], 1),
+                    'max_queries': stats['max_queries'],
+                    'avg_sql_ms': round(stats['sql_ms'] / stats['requests'], 2),
+                    'budget': stats['budget'],
+                    'over_budget': stats['over_budget'],
+                    'slowest': [
+                        {'ms': round(duration, 2), 'sql': sql}
+                        for duration, sql in sorted(stats['slowest'], reverse=True)
+                    ],
+                    'repeated': [
+                        {'times': count, 'shape': shape}
+                        for shape, count in repeated[:REPEATED_SHAPES_LIMIT]
+                    ],
+                })
+        return sorted(views, key=lambda view: view['avg_queries'] * view['requests'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+query_stats = QueryStats()
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'QUERY_BUDGET_STRICT', False)
+        self.repeat_threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+
+    def __call__(self, request):
+        queries = RequestQueries()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+        budget = get_query_budget(view_name)
+        repeated = query_stats.record(view_name, queries, budget, self.repeat_threshold)
+
+        response['X-Query-Count'] = str(queries.count)
+        response['X-SQL-Time-Ms'] = f"{queries.total_ms:.1f}"
+
+        for count, shape in repeated:
+            logger.warning("Possible N+1 in %s: ran %d times: %s", view_name, count, shape)
+
+        if queries.count > budget:
+            message = f"{view_name} ran {queries.count} queries, over its budget of {budget}"
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
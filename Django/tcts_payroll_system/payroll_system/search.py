@@ -0,0 +1,142 @@
+"""
+Typeahead search over customers and employees.
+
+Every word of the query must be the start of one of the searched fields:
+a customer's first or last name, contact number or the plate number of one
+of their vehicles, or an employee's first or last name or contact number.
+Each field has a case-insensitive (NOCASE) index, so on SQLite every
+prefix is an index range scan and a lookup costs the same no matter how
+many customers there are.
+
+Results come in fixed-size pages and typeahead paging stops at
+SEARCH_MAX_RESULTS: a typeahead narrows as the user types instead of
+scrolling through every match. The customer and employee list pages use
+the same querysets and page sizes, but page through every row.
+"""
+from collections import namedtuple
+from django.db.models import Prefetch, Q
+from .models import Customer, Employee, Vehicle
+
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 25
+
+# No page reaches past this many matches
+SEARCH_MAX_RESULTS = 100
+
+# Extra words past this are ignored; each one adds a condition to the query
+SEARCH_MAX_TERMS = 4
+
+SearchPage = namedtuple('SearchPage', ['results', 'page', 'page_size', 'has_more'])
+
+
+def search_terms(query):
+    """Split a query into the words that are matched as prefixes."""
+    return (query or '').split()[:SEARCH_MAX_TERMS]
+
+
+def page_bounds(page, page_size, max_results=SEARCH_MAX_RESULTS):
+    """
+    Clamp the requested page and page size and return (page, page_size, offset, limit).
+    `limit` is the number of rows the page may show, which is less than the page size
+    on the last page before `max_results` and zero past it. A `max_results` of None
+    lets paging go on to the last row.
+    """
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = min(max(int(page_size), 1), SEARCH_MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        page_size = SEARCH_PAGE_SIZE
+
+    offset = (page - 1) * page_size
+    limit = page_size
+    if max_results is not None:
+        offset = min(offset, max_results)
+        limit = min(page_size, max_results - offset)
+    return page, page_size, offset, limit
+
+
+def paginate(queryset, page, page_size, max_results=SEARCH_MAX_RESULTS):
+    """Slice one page out of `queryset`, fetching one extra row to tell whether another page follows."""
+    page, page_size, offset, limit = page_bounds(page, page_size, max_results)
+    if limit <= 0:
+        return SearchPage([], page, page_size, False)
+
+    rows = list(queryset[offset:offset + limit + 1])
+    has_more = len(rows) > limit and (max_results is None or offset + limit < max_results)
+    return SearchPage(rows[:limit], page, page_size, has_more)
+
+
+def customer_queryset(query):
+    """Customers matching every word of `query`, ordered by name."""
+    terms = search_terms(query)
+    if not terms:
+        return Customer.objects.none()
+
+    # Plates are matched through a subquery on the vehicle index rather than a join,
+    # so a customer with several matching vehicles is still listed once
+    def plate_matches(prefix):
+        return Vehicle.objects.filter(plate_number__istartswith=prefix).values('customer_id')
+
+    customers = Customer.objects.all()
+    for term in terms:
+        customers = customers.filter(
+            Q(first_name__istartswith=term)
+            | Q(last_name__istartswith=term)
+            | Q(contact_number__istartswith=term)
+            | Q(customer_id__in=plate_matches(term))
+        )
+
+    # Plate numbers are usually written with a space ("ABC 1234"), so the whole query is a
+    # plate prefix too. It runs as its own indexed query combined by primary key: OR-ing it
+    # onto the per-word conditions would make SQLite scan the whole customer table
+    if len(terms) > 1:
+        matching_ids = customers.values('customer_id').union(plate_matches(' '.join(terms)))
+        customers = Customer.objects.filter(customer_id__in=matching_ids)
+
+    return customers.order_by('last_name', 'first_name', 'customer_id')
+
+
+def employee_queryset(query):
+    """Employees matching every word of `query`, ordered by name."""
+    terms = search_terms(query)
+    if not terms:
+        return Employee.objects.none()
+
+    queryset = Employee.objects.all()
+    for term in terms:
+        condition = (
+            Q(first_name__istartswith=term)
+            | Q(last_name__istartswith=term)
+            | Q(contact_number__istartswith=term)
+        )
+        # Employee IDs are printed on payslips and the attendance screen
+        if term.isdigit():
+            condition |= Q(employee_id=int(term))
+        queryset = queryset.filter(condition)
+
+    return queryset.order_by('last_name', 'first_name', 'employee_id')
+
+
+def search_customers(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """One page of customers matching `query`, each with the plate numbers of their vehicles."""
+    customers = (
+        customer_queryset(query)
+        .only('customer_id', 'first_name', 'middle_name', 'last_name', 'contact_number')
+        .prefetch_related(Prefetch(
+            'vehicles',
+            queryset=Vehicle.objects.only('vehicle_id', 'customer_id', 'plate_number').order_by('plate_number'),
+        ))
+    )
+    return paginate(customers, page, page_size)
+
+
+def search_employees(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """One page of employees matching `query`."""
+    employees = employee_queryset(query).only(
+        'employee_id', 'first_name', 'middle_name', 'last_name', 'contact_number', 'is_active'
+    )
+    return paginate(employees, page, page_size)
+
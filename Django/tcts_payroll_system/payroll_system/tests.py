@@ -1,3 +1,274 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock, skipUnless
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from . import models
+from .dashboard import build_dashboard_context
+from .search import SEARCH_MAX_PAGE_SIZE, SEARCH_MAX_RESULTS, SEARCH_PAGE_SIZE, customer_queryset, employee_queryset
+from .models import (
+    Attendance, Barangay, City, Customer, DailyAttendanceSummary, Employee, Gender, History, PayrollPeriod,
+    PayrollRecord, Province, Region, Vehicle, deferred_payroll_recalculation,
+)
 
-# Create your tests here.
+
+def setUpModule():
+    # The PSGC reference tables are unmanaged (loaded from a SQL dump), so the test
+    # database does not have them; SQLite refuses writes to tables whose foreign keys
+    # point at a missing table
+    existing = connection.introspection.table_names()
+    with connection.schema_editor() as editor:
+        for model in (Region, Province, City, Barangay):
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+class DashboardQueryCountTests(TestCase):
+    """The dashboard service must run the same number of queries however many employees there are."""
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.period = PayrollPeriod.objects.create(
+            start_date=self.today - timedelta(days=3),
+            end_date=self.today + timedelta(days=3),
+            payment_date=self.today + timedelta(days=4),
+            payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS,
+        )
+
+    def add_employees(self, count):
+        """Add `count` employees with a payroll record, today's attendance and a history row each."""
+        start = Employee.objects.count()
+        employees = Employee.objects.bulk_create([
+            Employee(
+                first_name=f"First{number}",
+                last_name=f"Last{number}",
+                gender=Gender.MALE,
+                contact_number=f"0917{number:07d}",
+                daily_rate=500,
+                employee_image='images/employee.jpg',
+            )
+            for number in range(start, start + count)
+        ])
+        PayrollRecord.objects.bulk_create([
+            PayrollRecord(employee=employee, payroll_period=self.period, days_worked=1, gross_pay=500, net_pay=500)
+            for employee in employees
+        ])
+        Attendance.objects.bulk_create([
+            Attendance(employee=employee, date=self.today, attendance_status=Attendance.AttendanceStatus.PRESENT)
+            for employee in employees
+        ])
+        DailyAttendanceSummary.objects.bulk_create([
+            DailyAttendanceSummary(employee=employee, date=self.today, present=True)
+            for employee in employees
+        ])
+        History.objects.bulk_create([
+            History(description=f"{employee.first_name} was added.") for employee in employees
+        ])
+
+    def test_query_count_does_not_grow_with_employees(self):
+        self.add_employees(1)
+        with CaptureQueriesContext(connection) as queries:
+            context = build_dashboard_context()
+        self.assertEqual(len(context['employees']), 1)
+
+        self.add_employees(30)
+        with self.assertNumQueries(len(queries)):
+            context = build_dashboard_context()
+
+        self.assertEqual(len(context['employees']), 31)
+        self.assertEqual(context['present_count'], 31)
+        self.assertTrue(all(employee.payroll_record is not None for employee in context['employees']))
+
+
+class PayrollRecalculationTests(TestCase):
+    """Attendance writes only flag and queue payroll records; recalculation happens off the request."""
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        period = PayrollPeriod.objects.create(
+            start_date=self.today - timedelta(days=3),
+            end_date=self.today + timedelta(days=3),
+            payment_date=self.today + timedelta(days=3),
+            payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS,
+        )
+        self.employee = Employee.objects.bulk_create([Employee(
+            first_name="Ana",
+            last_name="Cruz",
+            gender=Gender.FEMALE,
+            contact_number="09170000001",
+            daily_rate=500,
+            employee_image='images/employee.jpg',
+        )])[0]
+        self.record = PayrollRecord.objects.create(employee=self.employee, payroll_period=period)
+
+    def test_punch_hands_flagged_records_to_the_worker(self):
+        with mock.patch.object(models._recalculation_worker, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                Attendance.clock_in(self.employee, self.today, time(8))
+
+        submit.assert_called_once_with({(self.employee.employee_id, self.record.payroll_period_id)})
+        self.record.refresh_from_db()
+        self.assertTrue(self.record.needs_recalculation)
+        self.assertEqual(self.record.days_worked, 0)
+
+    @override_settings(PAYROLL_RECALCULATION_IN_BACKGROUND=False)
+    def test_queue_does_not_outlive_a_failed_request(self):
+        with self.assertRaises(RuntimeError):
+            with deferred_payroll_recalculation():
+                Attendance.clock_in(self.employee, self.today, time(8))
+                raise RuntimeError("view failed")
+
+        self.assertFalse(models._recalculation_queue.pending)
+        self.record.refresh_from_db()
+        self.assertFalse(self.record.needs_recalculation)
+        self.assertEqual(self.record.days_worked, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are checked against SQLite's EXPLAIN QUERY PLAN")
+class HotQueryIndexTests(TestCase):
+    """The hot payroll and attendance queries must be answered from their indexes (migration 0009)."""
+
+    def setUp(self):
+        self.today = timezone.now().date()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf"USING (COVERING )?INDEX {index_name}\b", f"Query plan does not use {index_name}:\n{plan}")
+
+    def test_attendance_by_employee_and_date(self):
+        # Profile ranges, latest attendance and the daily summary refresh
+        self.assertUsesIndex(Attendance.objects.filter(employee_id=1, date=self.today), 'attendance_employee_date')
+        self.assertUsesIndex(
+            Attendance.objects.filter(employee_id=1, date__range=(self.today - timedelta(days=6), self.today)),
+            'attendance_employee_date',
+        )
+
+    def test_attendance_by_date_and_status(self):
+        # Company-wide date range reads filtered by status (summary rebuilds, reports)
+        self.assertUsesIndex(
+            Attendance.objects.filter(
+                date__range=(self.today - timedelta(days=6), self.today),
+                attendance_status=Attendance.AttendanceStatus.PRESENT,
+            ),
+            'attendance_date_status',
+        )
+
+    def test_open_attendance_session(self):
+        # Kiosk clock-out looks up the open session through the partial unique index
+        self.assertUsesIndex(
+            Attendance.objects.filter(employee_id=1, date=self.today, time_in__isnull=False, time_out__isnull=True),
+            'unique_open_attendance_session',
+        )
+
+    def test_payroll_period_by_status_and_dates(self):
+        # Attendance writes find the in-progress periods that cover the attendance date
+        self.assertUsesIndex(
+            PayrollPeriod.objects.filter(
+                payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS,
+                start_date__lte=self.today,
+                end_date__gte=self.today,
+            ),
+            'payroll_period_status_end',
+        )
+
+    def test_payroll_records_by_period_and_employee(self):
+        # Period-wide record reads, in employee order; a single (employee, period) pair
+        # is looked up through the unique_employee_payroll_period constraint instead
+        self.assertUsesIndex(
+            PayrollRecord.objects.filter(payroll_period_id=1).order_by('employee_id'),
+            'payroll_record_period_emp',
+        )
+
+    def test_dirty_payroll_records(self):
+        self.assertUsesIndex(
+            PayrollRecord.objects.filter(needs_recalculation=True, payroll_period_id=1),
+            'payroll_record_dirty',
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are checked against SQLite's EXPLAIN QUERY PLAN")
+class SearchIndexTests(TestCase):
+    """Typeahead searches must be index range scans, never a scan of the whole table (migration 0010)."""
+
+    def assertIndexedPlan(self, queryset, table, index_names):
+        plan = queryset.explain()
+        self.assertNotIn(f"SCAN {table}", plan)
+        for index_name in index_names:
+            self.assertIn(f"INDEX {index_name}", plan)
+
+    def test_customer_search(self):
+        customer_indexes = ['customer_first_name_search', 'customer_last_name_search', 'customer_contact_search', 'vehicle_plate_search']
+        self.assertIndexedPlan(customer_queryset('juan'), 'payroll_system_customer', customer_indexes)
+        # Several words also try the whole query as a plate prefix
+        self.assertIndexedPlan(customer_queryset('juan cruz'), 'payroll_system_customer', customer_indexes)
+        self.assertIndexedPlan(customer_queryset('abc 12'), 'payroll_system_customer', customer_indexes)
+
+    def test_employee_search(self):
+        employee_indexes = ['employee_first_name_search', 'employee_last_name_search', 'employee_contact_search']
+        self.assertIndexedPlan(employee_queryset('ana'), 'payroll_system_employee', employee_indexes)
+        self.assertIndexedPlan(employee_queryset('ana cruz'), 'payroll_system_employee', employee_indexes)
+
+
+class ListPageTests(TestCase):
+    """The customer and employee list pages render one page of rows in a constant number of queries."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', '', 'password'))
+
+    def add_customers(self, count):
+        start = Customer.objects.count()
+        customers = Customer.objects.bulk_create([
+            Customer(first_name=f"First{number}", last_name=f"Cruz{number}", contact_number=f"0917{number:07d}")
+            for number in range(start, start + count)
+        ])
+        Vehicle.objects.bulk_create([
+            Vehicle(customer=customer, vehicle_name="Toyota Vios", vehicle_color="White", plate_number=f"ABC {customer.pk:04d}")
+            for customer in customers
+        ])
+
+    def add_employees(self, count):
+        start = Employee.objects.count()
+        Employee.objects.bulk_create([
+            Employee(
+                first_name=f"First{number}",
+                last_name=f"Cruz{number}",
+                gender=Gender.MALE,
+                contact_number=f"0917{number:07d}",
+                daily_rate=500,
+                employee_image='images/employee.jpg',
+            )
+            for number in range(start, start + count)
+        ])
+
+    def assertPagedList(self, url, add_rows, context_name):
+        add_rows(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        add_rows(SEARCH_MAX_RESULTS)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context[context_name]), SEARCH_PAGE_SIZE)
+        self.assertTrue(response.context['page'].has_more)
+
+        response = self.client.get(url, {'page_size': 1000})
+        self.assertEqual(len(response.context[context_name]), SEARCH_MAX_PAGE_SIZE)
+
+        # Past the typeahead's result cap, the list keeps paging to the last row
+        response = self.client.get(url, {'page': SEARCH_MAX_RESULTS // SEARCH_PAGE_SIZE + 1})
+        self.assertEqual(len(response.context[context_name]), 1)
+        self.assertFalse(response.context['page'].has_more)
+
+        response = self.client.get(url, {'q': 'cruz1'})
+        rows = response.context[context_name]
+        self.assertTrue(rows)
+        self.assertTrue(all(row.last_name.startswith('Cruz1') for row in rows))
+
+    def test_customer_list_is_paged(self):
+        self.assertPagedList(reverse('payroll_system:customers'), self.add_customers, 'customers')
+
+    def test_employee_list_is_paged(self):
+        self.assertPagedList(reverse('payroll_system:employees'), self.add_employees, 'employees')
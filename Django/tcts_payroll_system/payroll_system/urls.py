@@ -8,6 +8,7 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('employees/employee_registration/', views.employee_registration, name='employee_registration'),
     path('employees/employee_picture/', views.employee_picture, name='employee_picture'),
+    path('employees/employee_import/', views.employee_import, name='employee_import'),
     path('employees/', views.employees, name='employees'),
     path('employees/employee_profile/<int:employee_id>/', views.employee_profile, name='employee_profile'),
     path('employees/employee_edit/<int:employee_id>/', views.employee_edit, name='employee_edit'),    
@@ -38,11 +39,15 @@ urlpatterns = [
     path('ajax/get-provinces/', views.get_provinces, name='get_provinces'),
     path('ajax/get-cities/', views.get_cities, name='get_cities'),
     path('ajax/get-barangays/', views.get_barangays, name='get_barangays'),
+    path('ajax/locations/<str:region_code>/', views.get_region_locations, name='get_region_locations'),
     path('ajax/customer/<int:customer_id>/', views.get_customer_details, name='get_customer_details'),
+    path('ajax/search/customers/', views.customer_search, name='customer_search'),
+    path('ajax/search/employees/', views.employee_search, name='employee_search'),
     # path('payroll/update-payday/', views.update_payday, name='update_payday'),
     path('api/payroll-by-week/', views.payroll_by_week, name='payroll_by_week'),
     path('payrolls/payslip/<int:payroll_period_id>/', views.payslip, name='payslip'),
     #new - flores
     path('attendance/summary/', views.attendance_summary, name='attendance-summary'),
     path('api/payroll-chart-data/', views.payroll_chart_data, name='payroll_chart_data'),
+    path('debug/query-stats/', views.query_stats, name='query_stats'),
 ]
\ No newline at end of file
@@ -1,129 +1,73 @@
 import base64
-import calendar
-from datetime import datetime, date as date_class
+from datetime import datetime
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.db.models import OuterRef, Subquery, Sum, Min, Avg
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Max, Avg
 from django.forms import ValidationError
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
 from django.utils.timezone import now, timedelta
 from django.views.decorators.csrf import csrf_protect
 from .forms import EmployeeForm, EmployeeEditForm, PayrollPeriodForm, DeductionForm, ServiceForm, CustomerForm, CustomerEditForm, VehicleForm
-from .models import Employee, Attendance, PayrollPeriod, Deduction, PayrollRecord, History, Region, Province, City, Barangay, Service, Customer, Vehicle, Task 
+from .dashboard import get_dashboard_context
+from .employee_import import IMPORT_COLUMNS, ImportFileError, import_employees
+from .locations import get_location_index
+from .query_instrumentation import query_stats as instrumentation_stats
+from .search import SEARCH_PAGE_SIZE, customer_queryset, employee_queryset, paginate, search_customers, search_employees, search_terms
+from .models import Employee, Attendance, DailyAttendanceSummary, PayrollPeriod, Deduction, PayrollRecord, History, Service, Customer, Vehicle, Task 
 from urllib.parse import urlencode
-from django.views.decorators.http import require_GET
 from django.http import HttpResponseRedirect
 
 @csrf_protect  # Ensure CSRF protection
 
 @login_required
 def dashboard(request):
-    
-    latest_attendance_subquery = (
-        Attendance.objects
-        .filter(employee=OuterRef('pk'))
-        .order_by('-date')
-        .values('date')[:1]
-    )
+    # Employees, counts, payroll totals and recent history come from one cached service call
+    context = get_dashboard_context()
+    return render(request, 'payroll_system/dashboard.html', context)
+
+# Location data changes only when the ref* tables are reloaded; after this many
+# seconds clients revalidate with the ETag and normally get a 304
+LOCATION_CACHE_MAX_AGE = 60 * 60 * 24
 
-    # Get employees with their latest attendance date
-    employees = Employee.objects.annotate(
-        latest_attendance_date=Subquery(latest_attendance_subquery)
-    ).order_by('-latest_attendance_date', 'last_name')  # Order by most recent attendance date
+def location_response(request, kind, code):
+    # Precomputed JSON from the location index, gzipped when the client accepts it
+    payload = get_location_index().payload(kind, code)
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
     
-    # Get the current active payroll period
-    current_payroll_period = PayrollPeriod.objects.filter(
-        payroll_status=PayrollPeriod.PayrollStatus.INPROGRESS
-    ).first()
+    # Each encoding is a different representation, so each gets its own strong ETag
+    etag = quote_etag(f"{payload.etag}-gzip" if use_gzip else payload.etag)
     
-    # If there's a current payroll period, get the payroll records for each employee
-    if current_payroll_period:
-        for employee in employees:
-            try:
-                payroll_record = PayrollRecord.objects.get(
-                    employee=employee,
-                    payroll_period=current_payroll_period
-                )
-                employee.payroll_record = payroll_record
-            except PayrollRecord.DoesNotExist:
-                # Set default values if no payroll record exists
-                employee.payroll_record = None
-    
-    total_employees = Employee.objects.count()
-
-    # Get current week range (Monday to Sunday)
-    today = now().date()
-    start_of_week = today - timedelta(days=today.weekday())  # Get Monday of current week
-    end_of_week = start_of_week + timedelta(days=6)  # Get Sunday of current week
-    
-    # Count of unique active employees with at least one 'Present' attendance this week
-    avg_active_employees = Attendance.objects.filter(
-        date__range=[start_of_week, end_of_week],
-        attendance_status=Attendance.AttendanceStatus.PRESENT,
-        employee__is_active=True
-    ).values('employee').distinct().count()
-    
-    # Count how many unique employees have a PRESENT record **today**
-    present_count = Attendance.objects.filter(
-        date=today,
-        attendance_status=Attendance.AttendanceStatus.PRESENT,
-        employee__is_active=True
-    ).values('employee').distinct().count()
-    
-    # Absentees = all active employees MINUS those present today
-    absent_count = Employee.objects.filter(is_active=True).count() - present_count
-
-    # Count payroll periods grouped by status
-    processed_payroll_count = PayrollPeriod.objects.filter(
-        payroll_status=PayrollPeriod.PayrollStatus.PROCESSED
-    ).count()
-
-    pending_payroll_count = PayrollPeriod.objects.filter(
-        payroll_status=PayrollPeriod.PayrollStatus.PENDING
-    ).count()
-    
-    next_payday = PayrollPeriod.objects.filter(payment_date__gt=today).aggregate(Min('payment_date'))['payment_date__min']
-
-    histories = History.objects.order_by('-date_time')
-    
-    # Calculate payroll totals
-    payroll_totals = calculate_payroll_totals(request)
-     
-    context = { 
-        'histories': histories,
-        'employees': employees,
-        'total_employees': total_employees,
-        'avg_active_employees': round(avg_active_employees),
-        'processed_payroll_count': processed_payroll_count,
-        'pending_payroll_count': pending_payroll_count,
-        'next_payday': next_payday,
-        'total_payroll': payroll_totals.get('monthly_payroll', 0),
-        'weekly_payroll': payroll_totals.get('weekly_payroll', 0),
-        'monthly_payroll': payroll_totals.get('monthly_payroll', 0),
-        'yearly_payroll': payroll_totals.get('yearly_payroll', 0),
-        'present_count': present_count,
-        'absent_count': absent_count,
-    }
-    return render(request, 'payroll_system/dashboard.html', context)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(payload.gzipped if use_gzip else payload.body, content_type='application/json')
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=LOCATION_CACHE_MAX_AGE)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
 
 def get_provinces(request):
-    region_code = request.GET.get('region')
-    provinces = list(Province.objects.filter(regCode=region_code).values('provDesc', 'provCode'))
-    return JsonResponse({'provinces': provinces})
+    return location_response(request, 'provinces', request.GET.get('region'))
 
 def get_cities(request):
-    prov_code = request.GET.get('province')
-    cities = list(City.objects.filter(provCode=prov_code).values('citymunDesc', 'citymunCode'))
-    return JsonResponse({'cities': cities})
+    return location_response(request, 'cities', request.GET.get('province'))
 
 def get_barangays(request):
-    city_code = request.GET.get('city')
-    barangays = list(Barangay.objects.filter(citymunCode=city_code).values('brgyDesc', 'brgyCode'))
-    return JsonResponse({'barangays': barangays})
+    return location_response(request, 'barangays', request.GET.get('city'))
+
+def get_region_locations(request, region_code):
+    # A whole region down to barangays in one response, for kiosks that work offline
+    return location_response(request, 'region', region_code)
 
 @login_required
 def employee_registration(request):
@@ -142,7 +86,7 @@ def employee_registration(request):
     else:
         form = EmployeeForm()
     
-    regions = list(Region.objects.all().values('regDesc', 'regCode'))
+    regions = get_location_index().regions
     
     context = {
         'form': form,
@@ -182,7 +126,10 @@ def employee_picture(request):
             if form.is_valid():
                 employee = form.save(commit=False)
                 employee.employee_image = image_file
-                employee.save()
+                
+                # The form validated everything except the captured image
+                employee.clean_fields(exclude=[field.name for field in Employee._meta.fields if field.name != 'employee_image'])
+                employee.save(validate=False)
                 
                 History.objects.create(
                     description=f"Employee {employee.first_name} {employee.last_name} ({employee.employee_id}) was added."
@@ -200,6 +147,34 @@ def employee_picture(request):
             messages.error(request, "No image was captured. Please take a picture.")
     
     return render(request, 'payroll_system/employee_picture.html')
+
+@login_required
+def employee_import(request):
+    report = None
+    
+    if request.method == "POST":
+        csv_file = request.FILES.get('csv_file')
+        photos_zip = request.FILES.get('photos_zip')
+        
+        if not csv_file or not photos_zip:
+            messages.error(request, "Please choose both the CSV file and the zip of photos.")
+        else:
+            try:
+                report = import_employees(csv_file, photos_zip)
+            except ImportFileError as e:
+                messages.error(request, str(e))
+            else:
+                created = sum(1 for entry in report if entry['status'] == 'created')
+                if created:
+                    messages.success(request, f"Imported {created} of {len(report)} employees.")
+                else:
+                    messages.error(request, "No employees were imported. See the errors below.")
+    
+    context = {
+        'report': report,
+        'columns': IMPORT_COLUMNS,
+    }
+    return render(request, 'payroll_system/employee_import.html', context)
     
 
 @login_required
@@ -212,13 +187,19 @@ def employees(request):
         .values('date')[:1]
     )
 
-    # Base QuerySet with annotations
-    employees = Employee.objects.annotate(
-        latest_attendance_date=Subquery(latest_attendance_subquery)
-    )
+    # One page at a time, searched with the same indexed prefix match as the typeahead
+    query = request.GET.get('q', '')
+    if search_terms(query):
+        employees = employee_queryset(query)
+    else:
+        employees = Employee.objects.order_by('employee_id')
+    employees = employees.annotate(latest_attendance_date=Subquery(latest_attendance_subquery))
+    page = paginate(employees, request.GET.get('page'), request.GET.get('page_size', SEARCH_PAGE_SIZE), max_results=None)
     
     context = {
-        'employees': employees,
+        'employees': page.results,
+        'page': page,
+        'query': query,
     }
     return render(request, 'payroll_system/employees.html', context)
 
@@ -335,22 +316,22 @@ def employee_profile(request, employee_id):
         date__lte=end_date
     ).order_by('-date')
     
-    # Calculate attendance statistics for the filtered period
-    # Count DISTINCT days present to avoid counting multiple attendances on the same day
-    days_present = filtered_attendance.filter(
-        attendance_status=Attendance.AttendanceStatus.PRESENT
-    ).values('date').distinct().count()
-    
-    # Count DISTINCT days absent
-    days_absent = filtered_attendance.filter(
-        attendance_status=Attendance.AttendanceStatus.ABSENT
-    ).values('date').distinct().count()
+    # Calculate attendance statistics for the filtered period from the daily summary,
+    # which already holds one row per day (so no DISTINCT counting is needed)
+    daily_stats = employee.daily_attendance.filter(
+        date__gte=start_date,
+        date__lte=end_date
+    ).aggregate(
+        days_present=Count('pk', filter=Q(present=True)),
+        days_absent=Count('pk', filter=Q(absent=True)),
+        total_hours=Sum('total_hours')
+    )
     
     attendance_stats = {
         'total_days': (end_date - start_date).days + 1,
-        'days_present': days_present,
-        'days_absent': days_absent,
-        'total_hours': sum(a.hours_worked for a in filtered_attendance if a.hours_worked)
+        'days_present': daily_stats['days_present'],
+        'days_absent': daily_stats['days_absent'],
+        'total_hours': daily_stats['total_hours'] or 0
     }
     
     # Try to get the latest payroll record for this employee
@@ -398,7 +379,8 @@ def employee_edit(request, employee_id):
         form = EmployeeEditForm(instance=employee)
     
     # Get all regions for the dropdown
-    regions = Region.objects.all().order_by('regDesc').values('regDesc', 'regCode')
+    locations = get_location_index()
+    regions = locations.regions
     
     # Initialize lists for dependent dropdowns
     provinces = []
@@ -407,19 +389,13 @@ def employee_edit(request, employee_id):
     
     # Populate dependent dropdowns based on the employee's current location
     if employee.region:
-        provinces = Province.objects.filter(
-            regCode=employee.region.regCode
-        ).order_by('provDesc').values('provDesc', 'provCode', 'regCode')
+        provinces = locations.provinces(employee.region.regCode)
         
         if employee.province:
-            cities = City.objects.filter(
-                provCode=employee.province.provCode
-            ).order_by('citymunDesc').values('citymunDesc', 'citymunCode', 'provCode')
+            cities = locations.cities(employee.province.provCode)
             
             if employee.city:
-                barangays = Barangay.objects.filter(
-                    citymunCode=employee.city.citymunCode
-                ).order_by('brgyDesc').values('brgyDesc', 'brgyCode', 'citymunCode')
+                barangays = locations.barangays(employee.city.citymunCode)
     
     # Add JavaScript data to help maintain selected values
     context = {
@@ -502,28 +478,17 @@ def payroll_record(request):
     if payroll_id:
         payroll = get_object_or_404(PayrollPeriod, payroll_period_id=payroll_id)
         
-        # Get all PayrollRecords for the selected period, with employee data
-        records = PayrollRecord.objects.filter(payroll_period=payroll).select_related('employee')
-        
-        # If payroll is in progress, dynamically update all records
+        # If payroll is in progress, apply only the recalculations queued by attendance changes;
+        # the page itself just reads the stored values
         if payroll.payroll_status == PayrollPeriod.PayrollStatus.INPROGRESS:
-            for record in records:
-                # Check if attendance data has changed
-                current_days = record.days_worked
-                actual_days = record.calculate_days_worked()
-                
-                if current_days != actual_days:
-                    # Update the record
-                    record.days_worked = actual_days
-                    record.gross_pay = record.calculate_gross_pay()
-                    record.net_pay = record.calculate_net_pay()
-                    record.save(update_fields=['days_worked', 'gross_pay', 'net_pay'])
+            PayrollRecord.recalculate_dirty(payroll_period=payroll)
         
-        # Refresh the queryset to get updated data
+        # Get all PayrollRecords for the selected period, with employee data
         records = PayrollRecord.objects.filter(payroll_period=payroll).select_related('employee')
         
         # Calculate total payroll amount for this period
-        total_payroll = records.aggregate(total=Sum('net_pay'))['total'] or 0
+        totals = records.aggregate(total=Sum('net_pay'), last_recalculated_at=Max('recalculated_at'))
+        total_payroll = totals['total'] or 0
         
         # Calculate percentage change compared to previous period
         previous_payroll = PayrollPeriod.objects.filter(
@@ -547,6 +512,7 @@ def payroll_record(request):
             'total_payroll': total_payroll,
             'payroll_percentage': payroll_percentage,
             'payday_date': payroll.payment_date,
+            'last_recalculated_at': totals['last_recalculated_at'],
         }
     else:
         # If no payroll is selected, show nothing or default view
@@ -573,31 +539,16 @@ def payroll_individual(request, employee_id):
     
     if payroll_id:
         payroll = get_object_or_404(PayrollPeriod, payroll_period_id=payroll_id)
+        
+        # If payroll is in progress, apply only the recalculations queued by attendance changes
+        if payroll.payroll_status == PayrollPeriod.PayrollStatus.INPROGRESS:
+            PayrollRecord.recalculate_dirty(payroll_period=payroll)
                 
         selected_record = PayrollRecord.objects.filter(
             employee=employee,
             payroll_period__payroll_period_id=payroll_id
         ).select_related('payroll_period').first()
         
-        # If payroll is in progress, always check and update the record
-        if selected_record and payroll.payroll_status == PayrollPeriod.PayrollStatus.INPROGRESS:
-            # Check if attendance data has changed
-            current_days = selected_record.days_worked
-            actual_days = selected_record.calculate_days_worked()
-            
-            if current_days != actual_days:
-                # Update the record with fresh calculations
-                selected_record.days_worked = actual_days
-                selected_record.gross_pay = selected_record.calculate_gross_pay()
-                selected_record.net_pay = selected_record.calculate_net_pay()
-                selected_record.save(update_fields=['days_worked', 'gross_pay', 'net_pay'])
-                
-                # Refresh the record after update
-                selected_record = PayrollRecord.objects.filter(
-                    employee=employee,
-                    payroll_period__payroll_period_id=payroll_id
-                ).select_related('payroll_period').first()
-        
         # Only get the current payroll record instead of all records
         if selected_record:
             payroll_records = [selected_record]
@@ -671,12 +622,7 @@ def payroll_history(request):
             start_date__lte=last_year_end
         )
     
-    # Calculate total net pay for each payroll period using your existing aggregate method
-    for period in processed_periods:
-        period.total_net_pay = period.payroll_records.aggregate(
-            total=Sum('net_pay')
-        )['total'] or 0
-    
+    # Each processed period carries its total net pay, frozen when it was confirmed
     # Pagination (10 records per page)
     from django.core.paginator import Paginator
     paginator = Paginator(processed_periods, 10)
@@ -751,12 +697,9 @@ def add_individual_deduction(request, payroll_record_id):
                         f"Please edit the existing deduction instead."
                     )
                 else:
+                    # Saving the deduction also updates the record's total deductions and net pay
                     deduction.save()
                     
-                    # Recalculate the net pay
-                    payroll_record.net_pay = payroll_record.calculate_net_pay()
-                    payroll_record.save(update_fields=['net_pay'])
-                    
                     messages.success(request, "Deduction added successfully.")
                     
                     # Build the base URL
@@ -793,33 +736,9 @@ def edit_deductions(request):
             amount = deduction_form.cleaned_data['amount']
             payroll_period = deduction_form.cleaned_data['payroll_period']
             
-            # Get all payroll records for the selected period
-            payroll_records = PayrollRecord.objects.filter(payroll_period=payroll_period)
-            
-            # Track statistics for user feedback
-            total_records = payroll_records.count()
-            added_count = 0
-            skipped_count = 0
-            
-            # Create a deduction for each payroll record if it doesn't already exist
-            for record in payroll_records:
-                # Check if this type of deduction already exists for this record
-                if not Deduction.objects.filter(
-                    payroll_record=record,
-                    deduction_type=deduction_type
-                ).exists():
-                    # Only create if it doesn't exist
-                    Deduction.objects.create(
-                        payroll_record=record,
-                        deduction_type=deduction_type,
-                        amount=amount
-                    )
-                    
-                    # Recalculate and save the net pay
-                    record.save()
-                    added_count += 1
-                else:
-                    skipped_count += 1
+            # Add the deduction to every record in the period that doesn't have it yet
+            added_count, skipped_count = payroll_period.apply_deduction(deduction_type, amount)
+            total_records = added_count + skipped_count
             
             # Provide detailed feedback message
             if added_count > 0:
@@ -891,24 +810,9 @@ def update_all_incentives(request):
                 messages.error(request, 'Can only update incentives for in-progress payroll periods.')
                 return redirect('payroll_system:payrolls')
             
-            # Get all payroll records for this period
-            records = PayrollRecord.objects.filter(payroll_period=payroll_period)
-            
-            # Update incentives for each record
-            for record in records:
-                current_incentives = record.incentives or 0  # Handle None values
-                
-                if action == 'add':
-                    record.incentives = current_incentives + amount
-                elif action == 'subtract':
-                    record.incentives = max(0, current_incentives - amount)
-                
-                # Recalculate gross pay and net pay
-                record.gross_pay = record.calculate_gross_pay()
-                record.net_pay = record.calculate_net_pay()
-                
-                # Save the record with updated values
-                record.save(update_fields=['incentives', 'gross_pay', 'net_pay'])
+            # Update incentives, gross pay and net pay for every record in one statement
+            if action in ('add', 'subtract'):
+                payroll_period.adjust_incentives(amount, subtract=action == 'subtract')
             
             messages.success(request, f'Successfully updated incentives for all employees!')
             
@@ -1100,19 +1004,16 @@ def services_client(request):
     vehicle_form = VehicleForm()
 
     # Get regions for dropdown
-    regions = list(Region.objects.all().values('regDesc', 'regCode'))
+    regions = get_location_index().regions
     
     # Get province for filtered dropdown
-    province = Province.objects.filter(provDesc='ZAMBOANGA DEL SUR').first()
+    province = get_location_index().province('ZAMBOANGA DEL SUR')
     
     # Get cities for the province
     cities = []
     if province:
-        cities = list(City.objects.filter(provCode=province.provCode).values('citymunDesc', 'citymunCode'))
+        cities = get_location_index().cities(province.provCode)
     
-    # Get all customers for search functionality
-    customers = Customer.objects.all()
-
     # Define default values - these will be used in both the template and JavaScript
     default_values = {
         'region': 'REGION IX (ZAMBOANGA PENINSULA)',
@@ -1126,7 +1027,6 @@ def services_client(request):
         'vehicle_form': vehicle_form,
         'regions': regions,
         'cities': cities,
-        'customers': customers,
         'should_clear_storage': True,
         'default_region': default_values['region'],
         'default_province': default_values['province'],
@@ -1170,6 +1070,42 @@ def get_customer_details(request, customer_id):
     except Customer.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Customer not found'})
 
+@login_required
+def customer_search(request):
+    # Typeahead: one capped page of customers whose name, contact number or plate starts with the query
+    result = search_customers(request.GET.get('q'), request.GET.get('page'), request.GET.get('page_size'))
+
+    customers = [
+        {
+            'id': customer.customer_id,
+            'name': ' '.join(filter(None, [customer.first_name, customer.middle_name, customer.last_name])),
+            'first_name': customer.first_name,
+            'last_name': customer.last_name,
+            'contact_number': customer.contact_number,
+            'plate_numbers': [vehicle.plate_number for vehicle in customer.vehicles.all()],
+            'url': reverse('payroll_system:customer_page', args=[customer.customer_id]),
+        }
+        for customer in result.results
+    ]
+    return JsonResponse({'results': customers, 'page': result.page, 'page_size': result.page_size, 'has_more': result.has_more})
+
+@login_required
+def employee_search(request):
+    # Typeahead: one capped page of employees whose name or contact number starts with the query
+    result = search_employees(request.GET.get('q'), request.GET.get('page'), request.GET.get('page_size'))
+
+    employees = [
+        {
+            'id': employee.employee_id,
+            'name': ' '.join(filter(None, [employee.first_name, employee.middle_name, employee.last_name])),
+            'contact_number': employee.contact_number,
+            'is_active': employee.is_active,
+            'url': reverse('payroll_system:employee_profile', args=[employee.employee_id]),
+        }
+        for employee in result.results
+    ]
+    return JsonResponse({'results': employees, 'page': result.page, 'page_size': result.page_size, 'has_more': result.has_more})
+
 @login_required
 def services_assign(request):
     if request.method == 'POST':
@@ -1277,7 +1213,7 @@ def services_assign(request):
                         customer_form = CustomerForm(instance=customer)
                         
                         # Get all necessary data for the template again
-                        regions = list(Region.objects.all().values('regDesc', 'regCode'))
+                        regions = get_location_index().regions
                         
                         return render(request, 'payroll_system/services_client.html', {
                             'customer_form': customer_form, 
@@ -1314,7 +1250,7 @@ def services_assign(request):
                     })
                 else:
                     # If form validation fails, go back to the customer form with errors
-                    regions = list(Region.objects.all().values('regDesc', 'regCode'))
+                    regions = get_location_index().regions
                     
                     return render(request, 'payroll_system/services_client.html', {
                         'customer_form': customer_form, 
@@ -1367,20 +1303,17 @@ def status(request):
                     ).order_by('-end_date').first()
                     
                     if active_period:
-                        # Get or create payroll record for this employee in the active period
-                        payroll_record, created = PayrollRecord.objects.get_or_create(
-                            employee=task.employee,
-                            payroll_period=active_period
-                        )
-                        
-                        # Add incentive
-                        payroll_record.incentives += float(amount)
-                        payroll_record.save()
-                        
-                        # Recalculate gross pay and net pay
-                        payroll_record.gross_pay = payroll_record.calculate_gross_pay()
-                        payroll_record.net_pay = payroll_record.calculate_net_pay()
-                        payroll_record.save()  # Save all fields instead of update_fields
+                        with transaction.atomic():
+                            # Lock (creating if needed) the employee's record in the active
+                            # period so concurrent incentive posts cannot overwrite each other
+                            payroll_record = PayrollRecord.objects.get_for_update(
+                                task.employee_id,
+                                active_period.pk
+                            )
+                            
+                            # Add incentive; saving an in-progress record recalculates gross and net pay
+                            payroll_record.incentives += float(amount)
+                            payroll_record.save()
                         
                         # Create history record
                         History.objects.create(
@@ -1403,12 +1336,20 @@ def status(request):
 
 @login_required
 def customers(request):
-    customers = Customer.objects.all()
-    detail_number = Vehicle.objects.all()
+    # One page at a time, searched with the same indexed prefix match as the typeahead
+    query = request.GET.get('q', '')
+    if search_terms(query):
+        customers = customer_queryset(query)
+    else:
+        customers = Customer.objects.order_by('customer_id')
+    # The table shows each customer's city, barangay and plates; load them with the page
+    customers = customers.select_related('city', 'barangay').prefetch_related('vehicles')
+    page = paginate(customers, request.GET.get('page'), request.GET.get('page_size', SEARCH_PAGE_SIZE), max_results=None)
 
     context = {
-        'customers': customers,
-        'detail_number': detail_number
+        'customers': page.results,
+        'page': page,
+        'query': query,
     }
     return render(request, 'payroll_system/customers.html', context)
 
@@ -1434,7 +1375,8 @@ def customer_edit(request, customer_id):
         form = CustomerEditForm(instance=customer)
     
     # Get location data for dropdowns
-    regions = Region.objects.all().values('regDesc', 'regCode')
+    locations = get_location_index()
+    regions = locations.regions
     
     # Get related provinces, cities, and barangays based on selected values
     provinces = []
@@ -1442,13 +1384,13 @@ def customer_edit(request, customer_id):
     barangays = []
     
     if customer.region:
-        provinces = Province.objects.filter(regCode=customer.region.regCode).order_by('provDesc')
+        provinces = locations.provinces(customer.region.regCode)
         
         if customer.province:
-            cities = City.objects.filter(provCode=customer.province.provCode).order_by('citymunDesc')
+            cities = locations.cities(customer.province.provCode)
             
             if customer.city:
-                barangays = Barangay.objects.filter(citymunCode=customer.city.citymunCode).order_by('brgyDesc')
+                barangays = locations.barangays(customer.city.citymunCode)
     
     context = {
         'form': form,
@@ -1497,70 +1439,20 @@ def payroll_by_week(request):
     # Format dates for labels 
     labels = [date.strftime("%b %d") for date in saturdays]
     
-    # Get total payroll amount for each payment date by finding PayrollPeriods ending on Saturdays
-    amounts = []
-    for saturday in saturdays:
-        # Find the payroll period that ends on this Saturday
-        payroll_records = PayrollRecord.objects.filter(
-            payroll_period__end_date=saturday,
-            payroll_period__payroll_status=PayrollPeriod.PayrollStatus.PROCESSED
-        )
-        
-        # Sum the net pay for all employees in this period
-        weekly_total = payroll_records.aggregate(
-            total_net_pay=Sum('net_pay')
-        )['total_net_pay'] or 0
-        
-        amounts.append(round(weekly_total, 2))
+    # Total payroll of the processed periods ending on each Saturday, in one grouped query
+    weekly_totals = dict(
+        PayrollPeriod.objects.filter(
+            end_date__in=saturdays,
+            payroll_status=PayrollPeriod.PayrollStatus.PROCESSED
+        ).values('end_date').annotate(total=Sum('total_net_pay')).values_list('end_date', 'total')
+    )
+    amounts = [round(weekly_totals.get(saturday) or 0, 2) for saturday in saturdays]
     
     return JsonResponse({
         'labels': labels,
         'amounts': amounts
     })
     
-#new
-@login_required
-def calculate_payroll_totals(request):
-    """
-    Calculate weekly, monthly, and yearly payroll totals based on PayrollRecord data
-    """
-    today = timezone.now().date()
-    
-    # Calculate the start and end dates for periods
-    week_start = today - timedelta(days=today.weekday())  # Monday of current week
-    week_end = week_start + timedelta(days=6)  # Sunday of current week
-    
-    month_start = date_class(today.year, today.month, 1)  # First day of current month
-    last_day_of_month = calendar.monthrange(today.year, today.month)[1]
-    month_end = date_class(today.year, today.month, last_day_of_month)  # Last day of current month
-    
-    year_start = date_class(today.year, 1, 1)  # First day of current year
-    year_end = date_class(today.year, 12, 31)  # Last day of current year
-
-    # Query for weekly payroll total
-    weekly_payroll = PayrollRecord.objects.filter(
-        payroll_period__start_date__gte=week_start,
-        payroll_period__end_date__lte=week_end
-    ).aggregate(total=Sum('net_pay'))['total'] or 0
-    
-    # Query for monthly payroll total
-    monthly_payroll = PayrollRecord.objects.filter(
-        payroll_period__start_date__gte=month_start,
-        payroll_period__end_date__lte=month_end
-    ).aggregate(total=Sum('net_pay'))['total'] or 0
-    
-    # Query for yearly payroll total
-    yearly_payroll = PayrollRecord.objects.filter(
-        payroll_period__start_date__gte=year_start,
-        payroll_period__end_date__lte=year_end
-    ).aggregate(total=Sum('net_pay'))['total'] or 0
-
-    return {
-        'weekly_payroll': weekly_payroll,
-        'monthly_payroll': monthly_payroll,
-        'yearly_payroll': yearly_payroll
-    }
-
 @login_required    
 def get_next_payday(employee):
     """
@@ -1582,38 +1474,6 @@ def get_next_payday(employee):
     
     return None
 
-@login_required
-@require_GET
-def payroll_chart_data(request):
-    """
-    Endpoint to retrieve payroll data for the chart
-    Returns payment dates and total net pay amounts for the last 6 payroll periods
-    """
-    # Get the 6 most recent payroll periods
-    recent_periods = PayrollPeriod.objects.order_by('-payment_date')[:6]
-    
-    # Prepare data structure
-    chart_data = {
-        'labels': [],
-        'values': []
-    }
-    
-    # Process the periods in reverse order (oldest to newest)
-    for period in reversed(list(recent_periods)):
-        # Format date as DD/MM/YYYY
-        formatted_date = period.payment_date.strftime('%d/%m/%Y')
-        
-        # Get total net pay for this period
-        total_net_pay = PayrollRecord.objects.filter(
-            payroll_period=period
-        ).aggregate(total=Sum('net_pay'))['total'] or 0
-        
-        # Add to chart data
-        chart_data['labels'].append(formatted_date)
-        chart_data['values'].append(round(total_net_pay, 2))
-    
-    return JsonResponse(chart_data)
-
 @login_required
 def payslip(request, payroll_period_id):
     # Get the payroll period
@@ -1716,19 +1576,16 @@ def attendance_summary(request):
         end_date = today
         period_display = "Today"
     
-    # Count present records
-    present_count = Attendance.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date,
-        attendance_status=Attendance.AttendanceStatus.PRESENT
-    ).count()
-    
-    # Count absent records
-    absent_count = Attendance.objects.filter(
+    # Count present and absent employee-days from the daily summary in one range read
+    counts = DailyAttendanceSummary.objects.filter(
         date__gte=start_date,
-        date__lte=end_date,
-        attendance_status=Attendance.AttendanceStatus.ABSENT
-    ).count()
+        date__lte=end_date
+    ).aggregate(
+        present=Count('pk', filter=Q(present=True)),
+        absent=Count('pk', filter=Q(absent=True))
+    )
+    present_count = counts['present']
+    absent_count = counts['absent']
     
     # Format data to match what the chart.js script expects
     data = {
@@ -1763,6 +1620,9 @@ def print(request):
     total_salary = 0
     
     if in_progress_payroll_period:
+        # Apply any pending attendance-driven recalculation before printing
+        PayrollRecord.recalculate_dirty(payroll_period=in_progress_payroll_period)
+        
         # Get all payroll records for this period (more efficient than querying for each employee)
         payroll_records = PayrollRecord.objects.filter(
             payroll_period=in_progress_payroll_period
@@ -1817,19 +1677,29 @@ def print(request):
 
 @login_required
 def payroll_chart_data(request):
+    # Processed periods carry their frozen totals, so the whole chart is one query
     processed_periods = PayrollPeriod.objects.filter(
         payroll_status=PayrollPeriod.PayrollStatus.PROCESSED
-    ).order_by('end_date')
+    ).order_by('end_date').values_list('end_date', 'total_net_pay')
 
-    data = []
-    for period in processed_periods:
-        total = PayrollRecord.objects.filter(
-            payroll_period=period
-        ).aggregate(total=Sum('net_pay'))['total'] or 0
+    data = [
+        {
+            'label': end_date.strftime('%Y-%m-%d'),
+            'value': float(total_net_pay)
+        }
+        for end_date, total_net_pay in processed_periods
+    ]
+
+    return JsonResponse(data, safe=False)
 
-        data.append({
-            'label': period.end_date.strftime('%Y-%m-%d'),
-            'value': float(total)
-        })
+@login_required
+@user_passes_test(lambda user: user.is_superuser)
+def query_stats(request):
+    # Per-view query aggregates collected by QueryInstrumentationMiddleware; POST clears them
+    if request.method == 'POST':
+        instrumentation_stats.reset()
 
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    return JsonResponse({
+        'enabled': settings.QUERY_INSTRUMENTATION,
+        'views': instrumentation_stats.snapshot(),
+    })
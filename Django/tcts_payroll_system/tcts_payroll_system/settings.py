@@ -43,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'payroll_system.query_instrumentation.QueryInstrumentationMiddleware',
+    # Hands the payroll records a request's attendance writes flagged to the recalculation worker, once, after the view
+    'payroll_system.payroll_recalculation.PayrollRecalculationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -135,6 +138,27 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Persisted face embeddings (see attendance/face_gallery.py). Kept outside MEDIA_ROOT,
+# which is served publicly, so the embeddings are never downloadable
+FACE_GALLERY_DIR = os.path.join(BASE_DIR, 'face_gallery')
+FACE_GALLERY_DTYPE = 'float32'
+
+# Recalculate payroll records flagged by attendance writes on a background thread
+# (see PayrollRecalculationWorker in payroll_system/models.py) instead of in the punch request
+PAYROLL_RECALCULATION_IN_BACKGROUND = True
+
+# Per-view query count and SQL time instrumentation (see payroll_system/query_instrumentation.py).
+# Off by default; aggregates are served to superusers at payroll_system:query_stats
+QUERY_INSTRUMENTATION = False
+QUERY_BUDGET = 50
+QUERY_BUDGETS = {
+    'payroll_system:dashboard': 15,
+    'payroll_system:payroll_record': 25,
+    'payroll_system:payroll_history': 15,
+}
+QUERY_BUDGET_STRICT = False
+QUERY_REPEAT_THRESHOLD = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class App1Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app1'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from .models import Student, Attendance, CameraConfiguration
+        from .stats import invalidate_dashboard_stats
+
+        # Keep the cached dashboard numbers in step with attendance writes
+        for model in (Student, Attendance, CameraConfiguration):
+            post_save.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats_{model.__name__}_save')
+            post_delete.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats_{model.__name__}_delete')
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0010_remove_cameraconfiguration_success_sound_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date'], name='app1_attendance_student_date'),
+        ),
+    ]
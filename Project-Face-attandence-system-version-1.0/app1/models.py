@@ -18,6 +18,14 @@ class Attendance(models.Model):
     check_in_time = models.DateTimeField(null=True, blank=True)
     check_out_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Attendance list and check-in lookups filter by student and date
+            models.Index(fields=['student', 'date'], name='app1_attendance_student_date'),
+            # The attendance list filtered by date alone
+            models.Index(fields=['date'], name='app1_attendance_date'),
+        ]
+
     def __str__(self):
         return f"{self.student.name} - {self.date}"
 
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Student, Attendance, CameraConfiguration
+
+# Cache key and lifetime (in seconds) for the home dashboard numbers
+DASHBOARD_STATS_CACHE_KEY = 'app1:dashboard_stats'
+DASHBOARD_STATS_TTL = 60
+
+
+def compute_dashboard_stats():
+    """Compute the home dashboard numbers straight from the database."""
+    today = Q(date=timezone.now().date())
+
+    # Every attendance number, overall and for today, comes from one conditional aggregate
+    attendance = Attendance.objects.aggregate(
+        total_attendance=Count('id'),
+        total_check_ins=Count('id', filter=Q(check_in_time__isnull=False)),
+        total_check_outs=Count('id', filter=Q(check_out_time__isnull=False)),
+        today_attendance=Count('id', filter=today),
+        today_check_ins=Count('id', filter=today & Q(check_in_time__isnull=False)),
+        today_check_outs=Count('id', filter=today & Q(check_out_time__isnull=False)),
+    )
+
+    return {
+        'total_students': Student.objects.count(),
+        'total_cameras': CameraConfiguration.objects.count(),
+        **attendance,
+    }
+
+
+def get_dashboard_stats():
+    """Return the home dashboard numbers, served from the cache when fresh."""
+    stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_STATS_CACHE_KEY, stats, DASHBOARD_STATS_TTL)
+    return stats
+
+
+def invalidate_dashboard_stats(**kwargs):
+    """Signal receiver that drops the cached numbers after a relevant write."""
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
@@ -6,6 +6,7 @@ from facenet_pytorch import InceptionResnetV1, MTCNN
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
 from .models import Student, Attendance, CameraConfiguration
+from .stats import get_dashboard_stats
 from django.core.files.base import ContentFile
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -18,6 +19,8 @@ import threading
 import time
 import base64
 from django.db import IntegrityError
+from django.core.paginator import Paginator
+from itertools import groupby
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login
@@ -25,6 +28,9 @@ from django.contrib import messages
 from .models import Student
 
 
+# Number of attendance rows shown per page on the attendance list
+ATTENDANCE_PAGE_SIZE = 50
+
 # Initialize MTCNN and InceptionResnetV1
 mtcnn = MTCNN(keep_all=True)
 resnet = InceptionResnetV1(pretrained='vggface2').eval()
@@ -249,33 +255,33 @@ def student_attendance_list(request):
     search_query = request.GET.get('search', '')
     date_filter = request.GET.get('attendance_date', '')
 
-    # Get all students
-    students = Student.objects.all()
+    # Fetch all matching attendance rows in one query, joined with their student
+    attendance_records = Attendance.objects.select_related('student')
 
     # Filter students based on the search query
     if search_query:
-        students = students.filter(name__icontains=search_query)
+        attendance_records = attendance_records.filter(student__name__icontains=search_query)
 
-    # Prepare the attendance data
-    student_attendance_data = []
+    if date_filter:
+        # Assuming date_filter is in the format YYYY-MM-DD
+        attendance_records = attendance_records.filter(date=date_filter)
 
-    for student in students:
-        # Get the attendance records for each student, filtering by attendance date if provided
-        attendance_records = Attendance.objects.filter(student=student)
+    # Keep each student's rows together so they can be grouped per page
+    attendance_records = attendance_records.order_by('student__name', 'student_id', 'date')
 
-        if date_filter:
-            # Assuming date_filter is in the format YYYY-MM-DD
-            attendance_records = attendance_records.filter(date=date_filter)
+    # Paginate the attendance rows (one COUNT and one SELECT per page)
+    paginator = Paginator(attendance_records, ATTENDANCE_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
-        attendance_records = attendance_records.order_by('date')
-        
-        student_attendance_data.append({
-            'student': student,
-            'attendance_records': attendance_records
-        })
+    # Group the rows of the current page by student for the template
+    student_attendance_data = [
+        {'student': student, 'attendance_records': list(records)}
+        for student, records in groupby(page_obj.object_list, key=lambda attendance: attendance.student)
+    ]
 
     context = {
         'student_attendance_data': student_attendance_data,
+        'page_obj': page_obj,
         'search_query': search_query,  # Pass the search query to the template
         'date_filter': date_filter       # Pass the date filter to the template
     }
@@ -283,19 +289,8 @@ def student_attendance_list(request):
 
 
 def home(request):
-    total_students = Student.objects.count()
-    total_attendance = Attendance.objects.count()
-    total_check_ins = Attendance.objects.filter(check_in_time__isnull=False).count()
-    total_check_outs = Attendance.objects.filter(check_out_time__isnull=False).count()
-    total_cameras = CameraConfiguration.objects.count()
-
-    context = {
-        'total_students': total_students,
-        'total_attendance': total_attendance,
-        'total_check_ins': total_check_ins,
-        'total_check_outs': total_check_outs,
-        'total_cameras': total_cameras,
-    }
+    # Counts come from the cached stats layer (one aggregate per table on a miss)
+    context = get_dashboard_stats()
     return render(request, 'home.html', context)
 
 
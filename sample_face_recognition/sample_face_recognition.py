@@ -1,110 +1,212 @@
 import face_recognition
 import cv2
 import numpy as np
+import argparse
 import csv
 import os
+import time
 from datetime import datetime
 
-video_capture = cv2.VideoCapture(0)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DEFAULT_PHOTOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'photos')
 
 # Function to load and encode a single face
-def load_face_encoding(image_path, name):
+def load_face_encoding(image_path):
     try:
         image = face_recognition.load_image_file(image_path)
         encodings = face_recognition.face_encodings(image)
         if encodings:
             return encodings[0]
         else:
-            print(f"Warning: No face found in {name}.jpg")
+            print(f"Warning: No face found in {os.path.basename(image_path)}")
             return None
     except Exception as e:
-        print(f"Error loading {name}.jpg: {e}")
+        print(f"Error loading {os.path.basename(image_path)}: {e}")
         return None
 
-# Load known faces
-face_data = {
-    "ejay": r"C:\\Users\\Acer\\Desktop\\ATHENAS-GLARE\\face_recognition\\sample_face_recognition\\photos\\ejay.jpg",
-    "aaron": r"C:\\Users\\Acer\\Desktop\\ATHENAS-GLARE\\face_recognition\\sample_face_recognition\\photos\\aaron.jpg",
-    "tappy": r"C:\\Users\\Acer\\Desktop\\ATHENAS-GLARE\\face_recognition\\sample_face_recognition\\photos\\tappy.jpg",
-}
-
-known_face_encoding = []
-known_face_name = []
-
-for name, path in face_data.items():
-    encoding = load_face_encoding(path, name)
-    if encoding is not None:
-        known_face_encoding.append(encoding)
-        known_face_name.append(name)
-
-# Ensure there are known faces
-if not known_face_encoding:
-    print("No faces were loaded. Exiting...")
-    exit()
-
-students = known_face_name.copy()
-
-face_locations = []
-face_encodings = []
-face_names = []
-s = True
-
-now = datetime.now()
-current_date = now.strftime("%Y-%m-%d")
-
-# Open CSV file
-f = open(current_date + '.csv', 'w+', newline='')
-lnwriter = csv.writer(f)
-
-while True:
-    ret, frame = video_capture.read()
-    if not ret:
-        print("Failed to capture frame.")
-        break
-    
-    small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)  # Resize for faster processing
-    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)  # Ensure correct color format
-
-    if s:
-        # Detect face locations
-        face_locations = face_recognition.face_locations(rgb_small_frame, model="hog")
-        if not face_locations:
-            print("No faces detected in the frame.")
-            continue  # Skip to the next loop iteration
-
-        print(f"Detected {len(face_locations)} face(s).")
-
-        # Extract face encodings
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-        if not face_encodings:
-            print("No face encodings found, skipping frame.")
-            continue
-
-        face_names = []
-
-        for face_encoding in face_encodings:
-            matches = face_recognition.compare_faces(known_face_encoding, face_encoding)
-            name = "Unknown"
-
-            if any(matches):
-                face_distance = face_recognition.face_distance(known_face_encoding, face_encoding)
-                best_match_index = np.argmin(face_distance)
-                if matches[best_match_index]:
-                    name = known_face_name[best_match_index]
+# Load every photo in the enrollment directory, using the file name as the person's name
+def load_known_faces(photos_dir):
+    known_face_encoding = []
+    known_face_name = []
 
-            face_names.append(name)
-
-            if name in students:
-                students.remove(name)
-                print(f"{name} marked as present.")
-                current_time = datetime.now().strftime("%H:%M:%S")
-                lnwriter.writerow([name, current_time])
-
-    cv2.imshow("Attendance System", frame)
+    for filename in sorted(os.listdir(photos_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+        encoding = load_face_encoding(os.path.join(photos_dir, filename))
+        if encoding is not None:
+            known_face_encoding.append(encoding)
+            known_face_name.append(name)
+
+    # Stack into one matrix so each face is matched with a single distance computation
+    return np.array(known_face_encoding), known_face_name
+
+# Match one face against every known face with a single vectorized distance computation
+def match_face(known_face_encoding, known_face_name, face_encoding, tolerance):
+    distances = np.linalg.norm(known_face_encoding - face_encoding, axis=1)
+    best_match_index = int(np.argmin(distances))
+    if distances[best_match_index] <= tolerance:
+        return known_face_name[best_match_index]
+    return "Unknown"
+
+# Open the video source: a camera index ("0"), a video file, or a stream URL
+def open_video_source(source):
+    if source.isdigit():
+        return cv2.VideoCapture(int(source))
+    return cv2.VideoCapture(source)
+
+
+class AttendanceWriter:
+    """Append-only CSV writer that flushes to disk every few rows.
+
+    Rows keep the original name, HH:MM:SS layout with no header row, so
+    reopening the same day's file just appends to it.
+    """
+
+    def __init__(self, path, flush_every=20):
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        self.flush_every = flush_every
+        self.pending = 0
+        self.rows_written = 0
+
+    def write(self, name, when):
+        self.writer.writerow([name, when.strftime("%H:%M:%S")])
+        self.pending += 1
+        self.rows_written += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0:  # also rejects nan
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Recognize enrolled faces in a camera, video file or stream and log attendance to CSV."
+    )
+    parser.add_argument('--photos', default=DEFAULT_PHOTOS_DIR,
+                        help="Enrollment directory; each image file name is used as the person's name")
+    parser.add_argument('--source', default='0',
+                        help="Camera index, video file path or stream URL (default: 0)")
+    parser.add_argument('--output', default=None,
+                        help="Attendance CSV path (default: <today>.csv)")
+    parser.add_argument('--skip', type=int, default=2,
+                        help="Process one frame out of every N frames (default: 2)")
+    parser.add_argument('--scale', type=positive_float, default=0.25,
+                        help="Downscale factor applied before detection (default: 0.25)")
+    parser.add_argument('--tolerance', type=float, default=0.6,
+                        help="Maximum face distance for a match (default: 0.6)")
+    parser.add_argument('--flush-every', type=int, default=20,
+                        help="Flush the CSV after this many rows (default: 20)")
+    parser.add_argument('--max-frames', type=int, default=0,
+                        help="Stop after reading this many frames, 0 for no limit")
+    parser.add_argument('--no-display', action='store_true',
+                        help="Do not open a preview window (headless load generation)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    known_face_encoding, known_face_name = load_known_faces(args.photos)
+
+    # Ensure there are known faces
+    if not known_face_name:
+        print("No faces were loaded. Exiting...")
+        return 1
+
+    video_capture = open_video_source(args.source)
+    if not video_capture.isOpened():
+        print(f"Unable to open video source: {args.source}")
+        return 1
+
+    output_path = args.output or datetime.now().strftime("%Y-%m-%d") + '.csv'
+    attendance_writer = AttendanceWriter(output_path, flush_every=args.flush_every)
+
+    students = set(known_face_name)
+    skip = max(1, args.skip)
+    upscale = 1 / args.scale
+
+    frames_read = 0
+    frames_processed = 0
+    faces_detected = 0
+    face_locations = []
+    face_names = []
+    start = time.perf_counter()
 
-video_capture.release()
-cv2.destroyAllWindows()
-f.close()
+    try:
+        while True:
+            ret, frame = video_capture.read()
+            if not ret:
+                break
+            frames_read += 1
+
+            # Only run detection on every Nth frame; reuse the last result in between
+            if frames_read % skip == 0:
+                frames_processed += 1
+
+                small_frame = cv2.resize(frame, (0, 0), fx=args.scale, fy=args.scale)  # Resize for faster processing
+                rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)  # Ensure correct color format
+
+                face_locations = face_recognition.face_locations(rgb_small_frame, model="hog")
+                face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations) if face_locations else []
+                faces_detected += len(face_encodings)
+
+                face_names = []
+                for face_encoding in face_encodings:
+                    name = match_face(known_face_encoding, known_face_name, face_encoding, args.tolerance)
+                    face_names.append(name)
+
+                    if name in students:
+                        students.remove(name)
+                        print(f"{name} marked as present.")
+                        attendance_writer.write(name, datetime.now())
+
+            if not args.no_display:
+                for (top, right, bottom, left), name in zip(face_locations, face_names):
+                    top, right, bottom, left = (int(v * upscale) for v in (top, right, bottom, left))
+                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                    cv2.putText(frame, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+                cv2.imshow("Attendance System", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+            if args.max_frames and frames_read >= args.max_frames:
+                break
+    finally:
+        elapsed = time.perf_counter() - start
+        video_capture.release()
+        if not args.no_display:
+            cv2.destroyAllWindows()
+        attendance_writer.close()
+
+    # Summary, so the script can double as a CPU-only recognizer benchmark
+    print("--- Summary ---")
+    print(f"Frames read:       {frames_read}")
+    print(f"Frames processed:  {frames_processed}")
+    print(f"Faces detected:    {faces_detected}")
+    print(f"Attendance rows:   {attendance_writer.rows_written} -> {output_path}")
+    print(f"Elapsed:           {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Read FPS:          {frames_read / elapsed:.2f}")
+        print(f"Processed FPS:     {frames_processed / elapsed:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())